@@ -1,19 +1,118 @@
 import json
+import logging
+import logging.handlers
+import atexit
+import contextlib
+import contextvars
+import random
+import sys
+import uuid
 import telebot
 from flask import Flask, request
 import threading
+import queue
+import collections
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from telebot import types
 from aliexpress_api import AliexpressApi, models
+from aliexpress_api.tools import SQLiteCache, SingleFlight, RateLimiter, is_short_link, parse_product_id, unwrap_share_link
+from aliexpress_api.tools import MetricsRegistry
 import re
 import os
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, urljoin
 import urllib.parse
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Logging: records are queued on the calling thread and written by a background listener,
+# one JSON object per line (LOG_FORMAT=text for a console friendly layout)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# Share of updates whose debug payloads (full product details, ...) are logged
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.01'))
+
+class UpdateTrace:
+    """Trace id, sampling decision and stage timings of the update being handled"""
+    __slots__ = ('trace_id', 'sampled', 'stages')
+
+    def __init__(self, sampled):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.sampled = sampled
+        self.stages = []
+
+# Set while an update is handled, copied to the fan-out pool with submit_call
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+class TraceFilter(logging.Filter):
+    """Stamp records with the trace id of the update being handled"""
+
+    def filter(self, record):
+        trace = current_trace.get()
+        record.trace_id = trace.trace_id if trace is not None else None
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'trace_id', None):
+            entry['trace_id'] = record.trace_id
+        entry.update(getattr(record, 'fields', None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname} [{getattr(record, 'trace_id', None) or '-'}] {record.getMessage()}"
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + json.dumps(fields, ensure_ascii=False, default=str)
+        return line
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def fields(**values):
+    """Structured fields of a log record: logger.info('...', extra=fields(key=value))"""
+    return {'fields': values}
+
+def payload_sampled():
+    """True if debug payloads of the current update should be logged"""
+    trace = current_trace.get()
+    return trace is not None and trace.sampled and logger.isEnabledFor(logging.DEBUG)
+
+log_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+log_handler.addFilter(TraceFilter())
+log_output = logging.StreamHandler(sys.stdout)
+log_output.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JsonFormatter())
+log_listener = logging.handlers.QueueListener(log_handler.queue, log_output)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+logger = logging.getLogger('bot')
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(log_handler)
+logger.propagate = False
+
 # Initialize the bot with the token
 TELEGRAM_TOKEN_BOT = os.getenv('TELEGRAM_BOT_TOKEN')
 ALIEXPRESS_API_PUBLIC = os.getenv('ALIEXPRESS_API_PUBLIC')
@@ -21,24 +120,209 @@ ALIEXPRESS_API_SECRET = os.getenv('ALIEXPRESS_API_SECRET')
 
 # Check if required environment variables are set
 if not TELEGRAM_TOKEN_BOT:
-    print("❌ Error: TELEGRAM_BOT_TOKEN environment variable is not set!")
-    print("Please set the environment variable or create a .env file with your bot token.")
+    logger.critical("❌ Error: TELEGRAM_BOT_TOKEN environment variable is not set! "
+                    "Please set the environment variable or create a .env file with your bot token.")
     exit(1)
 
 if not ALIEXPRESS_API_PUBLIC or not ALIEXPRESS_API_SECRET:
-    print("❌ Error: ALIEXPRESS_API_PUBLIC and ALIEXPRESS_API_SECRET environment variables are not set!")
-    print("Please set the environment variables or create a .env file with your API credentials.")
+    logger.critical("❌ Error: ALIEXPRESS_API_PUBLIC and ALIEXPRESS_API_SECRET environment variables are not set! "
+                    "Please set the environment variables or create a .env file with your API credentials.")
     exit(1)
 
-bot = telebot.TeleBot(TELEGRAM_TOKEN_BOT)
+# Latency of every stage of a reply and its failures, served at /metrics
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram('bot_stage_duration_seconds', 'Time spent in each stage of handling an update', ['stage'])
+stage_errors = metrics.counter('bot_stage_errors_total', 'Failed stages of handling an update', ['stage'])
+
+metrics.callback('bot_log_records_dropped_total', 'Log records dropped because the log queue was full',
+                 'counter', collect=lambda: {(): log_handler.dropped})
+
+@contextlib.contextmanager
+def timed_stage(stage):
+    """Time the with block as stage, counting an exception as an error of the stage,
+    and add it to the stage timings of the current update"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.stages.append((stage, elapsed))
+
+# Define function to get the chat an update belongs to
+def update_chat_id(update):
+    """Return the chat id of an update, or a key of its own when it has no chat"""
+    for message in (update.message, update.edited_message, update.channel_post, update.edited_channel_post):
+        if message is not None:
+            return message.chat.id
+    if update.callback_query is not None:
+        if update.callback_query.message is not None:
+            return update.callback_query.message.chat.id
+        return update.callback_query.from_user.id
+    return ('update', update.update_id)
+
+class ChatDispatcher:
+    """Run updates on a pool of workers, one at a time and in order within a chat and in
+    parallel across chats. A chat with more pending updates goes back to the end of the
+    line after each one, so a busy or slow chat never holds up the others."""
+
+    def __init__(self, process, workers, capacity):
+        self.process = process
+        self.workers = workers
+        self.capacity = capacity
+        self.stats = {'received': 0, 'rejected': 0, 'processed': 0, 'failed': 0, 'max_depth': 0}
+        self._chats = {}
+        self._ready = queue.Queue()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        """Start the workers once (also when the app is served by gunicorn)"""
+        with self._condition:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                worker = threading.Thread(target=self._work, name=f'update-worker-{number}', daemon=True)
+                worker.start()
+                self._threads.append(worker)
+
+    def submit(self, update, timeout=None):
+        """Queue an update, waiting up to timeout seconds for room (raises queue.Full)"""
+        chat_id = update_chat_id(update)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pending < self.capacity, timeout):
+                self.stats['rejected'] += 1
+                raise queue.Full
+            self._pending += 1
+            self.stats['received'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], self._pending)
+            pending_updates = self._chats.get(chat_id)
+            if pending_updates is None:
+                self._chats[chat_id] = collections.deque([update])
+                self._ready.put(chat_id)
+            else:
+                pending_updates.append(update)
+
+    def snapshot(self):
+        with self._condition:
+            stats = dict(self.stats)
+            stats.update(depth=self._pending, chats=len(self._chats),
+                         capacity=self.capacity, workers=len(self._threads))
+        return stats
+
+    def _work(self):
+        while True:
+            chat_id = self._ready.get()
+            with self._condition:
+                # The update stays queued while it runs so later ones of the chat wait behind it
+                update = self._chats[chat_id][0]
+            try:
+                self.process(update)
+                result = 'processed'
+            except Exception:
+                result = 'failed'
+                logger.exception("Error processing update", extra=fields(update_id=update.update_id))
+            with self._condition:
+                self.stats[result] += 1
+                self._pending -= 1
+                pending_updates = self._chats[chat_id]
+                pending_updates.popleft()
+                if pending_updates:
+                    self._ready.put(chat_id)
+                else:
+                    del self._chats[chat_id]
+                self._condition.notify()
+
+# Telegram allows about 30 messages per second overall and about 1 per second per chat.
+# TELEGRAM_RATE_LIMIT_MODE=wait queues sends until a slot is free, fail raises RateLimitException.
+# A rate of 0 turns that limit off.
+TELEGRAM_RATE_LIMIT_BLOCK = os.getenv('TELEGRAM_RATE_LIMIT_MODE', 'wait') != 'fail'
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+telegram_global_limiter = None
+if TELEGRAM_GLOBAL_RATE > 0:
+    telegram_global_limiter = RateLimiter(TELEGRAM_GLOBAL_RATE, block=TELEGRAM_RATE_LIMIT_BLOCK)
+telegram_chat_limiter = None
+if TELEGRAM_CHAT_RATE > 0:
+    telegram_chat_limiter = RateLimiter(TELEGRAM_CHAT_RATE, float(os.getenv('TELEGRAM_CHAT_BURST', '3')),
+                                        per_key=True, block=TELEGRAM_RATE_LIMIT_BLOCK)
+
+def pace_telegram(chat_id):
+    if telegram_chat_limiter is not None:
+        telegram_chat_limiter.acquire(chat_id)
+    if telegram_global_limiter is not None:
+        telegram_global_limiter.acquire()
+
+class DispatchingTeleBot(telebot.TeleBot):
+    """TeleBot whose updates, polled or received by webhook, go through the chat dispatcher,
+    and whose sends and deletes are paced by the Telegram rate limiters"""
+
+    def process_new_updates(self, updates):
+        update_dispatcher.start()
+        for update in updates:
+            # Move the polling offset past the update now, not once a worker has handled it
+            self.last_update_id = max(self.last_update_id, update.update_id)
+            update_dispatcher.submit(update)
+
+    def send_message(self, chat_id, *args, **kwargs):
+        pace_telegram(chat_id)
+        with timed_stage('telegram_send_message'):
+            return super().send_message(chat_id, *args, **kwargs)
+
+    def send_photo(self, chat_id, *args, **kwargs):
+        pace_telegram(chat_id)
+        with timed_stage('telegram_send_photo'):
+            return super().send_photo(chat_id, *args, **kwargs)
+
+    def delete_message(self, chat_id, *args, **kwargs):
+        pace_telegram(chat_id)
+        with timed_stage('telegram_delete_message'):
+            return super().delete_message(chat_id, *args, **kwargs)
+
+def process_update(update):
+    """Handle one update under a new trace and log its stage timings"""
+    trace = UpdateTrace(random.random() < LOG_PAYLOAD_SAMPLE_RATE)
+    token = current_trace.set(trace)
+    try:
+        with timed_stage('update'):
+            telebot.TeleBot.process_new_updates(bot, [update])
+    finally:
+        stages = {}
+        for stage, elapsed in trace.stages:
+            stages[stage] = round(stages.get(stage, 0) + elapsed, 6)
+        logger.info("Update handled", extra=fields(update_id=update.update_id, chat_id=update_chat_id(update),
+                                                   stages=stages))
+        current_trace.reset(token)
+
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '1000'))
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', '8'))
+update_dispatcher = ChatDispatcher(process_update, UPDATE_WORKERS, UPDATE_QUEUE_SIZE)
+
+# Handlers run inline on the dispatcher workers instead of telebot's own pool
+bot = DispatchingTeleBot(TELEGRAM_TOKEN_BOT, threaded=False)
 
 # Initialize Aliexpress API
 try:
     aliexpress = AliexpressApi(ALIEXPRESS_API_PUBLIC, ALIEXPRESS_API_SECRET,
-                               models.Language.AR, models.Currency.EUR, 'telegramBot')
-    print("AliExpress API initialized successfully.")
-except Exception as e:
-    print(f"Error initializing AliExpress API: {e}")
+                               models.Language.AR, models.Currency.EUR, 'telegramBot',
+                               link_cache_ttl=int(os.getenv('LINK_CACHE_TTL', '86400')),
+                               link_cache_path=os.getenv('LINK_CACHE_PATH'),
+                               product_cache_size=int(os.getenv('PRODUCT_CACHE_SIZE', '10000')),
+                               product_batch_window=float(os.getenv('PRODUCT_BATCH_WINDOW', '0.02')),
+                               rate_limit=float(os.getenv('ALIEXPRESS_API_QPS', '10')),
+                               rate_limit_block=os.getenv('ALIEXPRESS_RATE_LIMIT_MODE', 'wait') != 'fail',
+                               max_retries=int(os.getenv('ALIEXPRESS_MAX_RETRIES', '2')),
+                               circuit_breaker_threshold=int(os.getenv('ALIEXPRESS_BREAKER_THRESHOLD', '5')),
+                               circuit_breaker_timeout=float(os.getenv('ALIEXPRESS_BREAKER_TIMEOUT', '30')))
+    logger.info("AliExpress API initialized successfully.")
+except Exception:
+    logger.exception("Error initializing AliExpress API")
 
 # Define keyboards
 keyboardStart = types.InlineKeyboardMarkup(row_width=1)
@@ -63,114 +347,211 @@ btn4 = types.InlineKeyboardButton("⭐️ لعبة قلب الاوراق Flip 
 btn5 = types.InlineKeyboardButton("⭐️ لعبة GoGo Match ⭐️", url="https://s.click.aliexpress.com/e/_DDs7W5D")
 keyboard_games.add(btn1, btn2, btn3, btn4, btn5)
 
-# Define function to get exchange rate from USD to MAD
-def get_usd_to_mad_rate():
+# Shared pool for the independent upstream calls of a message (FANOUT_WORKERS=0 runs them serially)
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '16'))
+fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout') if FANOUT_WORKERS > 0 else None
+
+def submit_call(fn, *args, **kwargs):
+    """Run fn on the shared fan-out pool and return its future (inline when the pool is disabled)"""
+    if fanout_pool is not None:
+        # Run in a copy of the caller's context so the call is logged under its trace
+        return fanout_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    future = Future()
     try:
-        response = requests.get('https://api.exchangerate-api.com/v4/latest/USD')
-        data = response.json()
-        return data['rates']['MAD']
+        future.set_result(fn(*args, **kwargs))
     except Exception as e:
-        print(f"Error fetching exchange rate: {e}")
-        return None
+        future.set_exception(e)
+    return future
+
+# In-process USD exchange rate table, refreshed in the background
+EXCHANGE_RATE_URL = os.getenv('EXCHANGE_RATE_URL', 'https://api.exchangerate-api.com/v4/latest/USD')
+EXCHANGE_RATE_REFRESH_SECONDS = int(os.getenv('EXCHANGE_RATE_REFRESH_SECONDS', '3600'))
+EXCHANGE_RATE_RETRY_SECONDS = 60
+exchange_rates = {}
+
+def refresh_exchange_rates():
+    """Fetch the rates of all currencies at once, keeping the last good table if it fails"""
+    global exchange_rates
+    try:
+        with timed_stage('exchange_rates'):
+            response = requests.get(EXCHANGE_RATE_URL, timeout=10)
+            response.raise_for_status()
+            rates = response.json()['rates']
+    except Exception as e:
+        logger.warning("Error fetching exchange rates", extra=fields(error=str(e)))
+        return False
+    # Swap the whole table so readers never see a partially updated one
+    exchange_rates = rates
+    return True
+
+def exchange_rate_refresher():
+    """Refresh the exchange rate table forever, retrying sooner after a failure"""
+    while True:
+        if refresh_exchange_rates():
+            time.sleep(EXCHANGE_RATE_REFRESH_SECONDS)
+        else:
+            time.sleep(min(EXCHANGE_RATE_RETRY_SECONDS, EXCHANGE_RATE_REFRESH_SECONDS))
+
+threading.Thread(target=exchange_rate_refresher, name='exchange-rates', daemon=True).start()
+
+# Define function to get exchange rate from USD to another currency
+def get_exchange_rate(currency):
+    """Return the cached USD -> currency rate, or None until the first refresh succeeds"""
+    return exchange_rates.get(currency)
+
+# Define function to get exchange rate from USD to MAD
+def get_usd_to_mad_rate():
+    return get_exchange_rate('MAD')
+
+# Persistent cache of resolved short links, shared across restarts
+redirect_cache = SQLiteCache(os.getenv('REDIRECT_CACHE_PATH', 'redirect_cache.sqlite3'),
+                             maxsize=int(os.getenv('REDIRECT_CACHE_SIZE', '10000')),
+                             ttl=int(os.getenv('REDIRECT_CACHE_TTL', '86400')))
+
+# Keep-alive session shared by all threads resolving short links
+REDIRECT_MAX_HOPS = 10
+redirect_session = requests.Session()
+redirect_session.headers['User-Agent'] = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                                          'AppleWebKit/537.36 (KHTML, like Gecko) '
+                                          'Chrome/58.0.3029.110 Safari/537.36')
+redirect_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=int(os.getenv('REDIRECT_POOL_SIZE', '32')))
+redirect_session.mount('https://', redirect_adapter)
+redirect_session.mount('http://', redirect_adapter)
+
+redirect_flight = SingleFlight()
+
+# Define function to follow the redirect chain of a link over the network
+def follow_redirect_chain(link):
+    """Walk the redirects of a link hop by hop without downloading page bodies, stopping at the
+    first URL whose product ID can be read (raises requests.RequestException)"""
+    final_url = link
+    for _ in range(REDIRECT_MAX_HOPS):
+        if parse_product_id(final_url):
+            break
+        response = redirect_session.get(final_url, allow_redirects=False, stream=True, timeout=10)
+        try:
+            if not response.is_redirect:
+                break
+            location = response.headers['Location']
+            # Redirect bodies are tiny, reading them hands the connection back to the pool
+            response.content
+        finally:
+            response.close()
+        final_url = urljoin(final_url, location)
+    # Extract redirectUrl parameter of star.aliexpress.com share pages
+    redirect_url = unwrap_share_link(final_url)
+    logger.debug("🔗 Resolved URL", extra=fields(link=link, resolved=final_url, redirect_url=redirect_url))
+    return redirect_url
 
 # Define function to resolve redirect chain and get final URL
 def resolve_full_redirect_chain(link):
-    """Resolve all redirects to get the final URL"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                      'AppleWebKit/537.36 (KHTML, like Gecko) '
-                      'Chrome/58.0.3029.110 Safari/537.36'
-    }
+    """Resolve all redirects to get the final URL, reusing previously resolved chains"""
+    with timed_stage('redirect'):
+        return _resolve_full_redirect_chain(link)
+
+def _resolve_full_redirect_chain(link):
+    # Links whose product ID can be read offline need no network round trip
+    offline_url = unwrap_share_link(link)
+    if parse_product_id(offline_url):
+        return offline_url
+    cached_url = redirect_cache.get(link)
+    if cached_url:
+        logger.debug("🔗 Cached URL", extra=fields(link=link, resolved=cached_url))
+        return cached_url
     try:
-        session_req = requests.Session()
-        response = session_req.get(link, allow_redirects=True, timeout=10, headers=headers)
-        final_url = response.url
-        print(f"🔗 Resolved URL: {link} -> {final_url}")
-        
-        if "star.aliexpress.com" in final_url:
-            # Extract redirectUrl parameter
-            parsed_url = urlparse(final_url)
-            params = parse_qs(parsed_url.query)
-            if 'redirectUrl' in params:
-                redirect_url = params['redirectUrl'][0]
-                print(f"🔗 Found redirectUrl: {redirect_url}")
-                return redirect_url
-        
-        if "aliexpress.com/item" in final_url:
-            return final_url
-        elif "p/coin-index" in final_url:
-            return final_url
-        else:
-            return final_url
+        # Identical links arriving together share one resolution
+        resolved_url = redirect_flight.do(link, follow_redirect_chain, link)
     except requests.RequestException as e:
-        print(f"❌ Error resolving redirect chain for link {link}: {e}")
+        stage_errors.inc(stage='redirect')
+        logger.warning("❌ Error resolving redirect chain", extra=fields(link=link, error=str(e)))
         return link  # Return original link if resolution fails
+    # A chain stopping short of a product page (interstitial, captcha) is tried again next time
+    if parse_product_id(resolved_url):
+        redirect_cache.set(link, resolved_url)
+    return resolved_url
 
 # Define function to extract product ID from link
-def extract_product_id(link):
-    """Extract product ID from AliExpress link (handles redirected/shortened links)"""
-    print(f"🔍 Extracting product ID from: {link}")
-    
-    # First resolve any redirects to get the final URL
-    resolved_link = resolve_full_redirect_chain(link)
-    print(f"🔗 Using resolved link: {resolved_link}")
-    
-    # Standard product page pattern
-    product_id_pattern = r'/item/(\d+)\.html'
-    match = re.search(product_id_pattern, resolved_link)
-    if match:
-        print(f"✅ Extracted product ID (standard): {match.group(1)}")
-        return match.group(1)
-    
-    # Coin page pattern - extract from productIds parameter
-    coin_page_pattern = r'productIds=(\d+)'
-    coin_match = re.search(coin_page_pattern, resolved_link)
-    if coin_match:
-        print(f"✅ Extracted product ID (coin-index): {coin_match.group(1)}")
-        return coin_match.group(1)
-    
-    # Alternative pattern for different URL formats (long product IDs)
-    product_id_pattern_alt = r'(\d{13,})'  # Long product IDs
-    match_alt = re.search(product_id_pattern_alt, resolved_link)
-    if match_alt:
-        print(f"✅ Extracted product ID (long format): {match_alt.group(1)}")
-        return match_alt.group(1)
+def extract_product_id(link, resolved=False):
+    """Extract product ID from AliExpress link, resolving only true short links over the network
+    unless the link already went through resolve_full_redirect_chain (resolved=True)"""
+    # Resolving a short link is timed as its own redirect stage, only parsing counts here
+    if not resolved and is_short_link(link):
+        link_to_parse = resolve_full_redirect_chain(link)
+    else:
+        link_to_parse = link
+    with timed_stage('extract_product_id'):
+        product_id = parse_product_id(link_to_parse)
     
-    print(f"❌ Could not extract product ID from: {resolved_link}")
-    return None
-
-# Define function to generate coin-index affiliate link for 620 channel
-def generate_coin_affiliate_link(product_id):
-    """Generate affiliate link using coin-index system for 620 channel"""
-    try:
-        # Create the coin-index URL
-        coin_index_url = f"https://m.aliexpress.com/p/coin-index/index.html?_immersiveMode=true&from=syicon&productIds={product_id}"
-        
-        # Generate affiliate link using the coin-index URL
-        affiliate_link = aliexpress.get_affiliate_links(coin_index_url)
-        return affiliate_link[0].promotion_link
-    except Exception as e:
-        print(f"❌ Error generating coin affiliate link for product {product_id}: {e}")
-        return None
+    if product_id:
+        logger.debug("✅ Extracted product ID", extra=fields(link=link, product_id=product_id))
+    else:
+        stage_errors.inc(stage='extract_product_id')
+        logger.warning("❌ Could not extract product ID", extra=fields(link=link))
+    return product_id
+
+# Define the source URL for each affiliate channel (620 coin, 560 bundle, 562 super, 561 limited)
+def build_channel_source_urls(product_id, resolved_link):
+    """Build the source URL of every affiliate channel for a product"""
+    # link.generate takes a comma-separated list, so commas inside a link must be escaped
+    resolved_link = resolved_link.replace(',', '%2C')
+    star_url = 'https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail&redirectUrl={}?sourceType={}&aff_fcid='
+    return {
+        'coin': f"https://m.aliexpress.com/p/coin-index/index.html?_immersiveMode=true&from=syicon&productIds={product_id}",
+        'bundle': star_url.format(resolved_link, 560),
+        'super': star_url.format(resolved_link, 562),
+        'limited': star_url.format(resolved_link, 561),
+    }
 
-# Define function to generate bundle affiliate link for 560 channel
-def generate_bundle_affiliate_link(product_id, original_link):
-    """Generate affiliate link using bundle system for 560 channel"""
-    try:
-        # Create the bundle URL with sourceType=560
-        bundle_url = f'https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail&redirectUrl={original_link}?sourceType=560&aff_fcid='
-        
-        # Generate affiliate link using the bundle URL
-        affiliate_link = aliexpress.get_affiliate_links(bundle_url)
-        return affiliate_link[0].promotion_link
-    except Exception as e:
-        print(f"❌ Error generating bundle affiliate link for product {product_id}: {e}")
-        return None
+# Define function to generate the affiliate links of all channels in one API call
+def generate_channel_affiliate_links(product_id, resolved_link):
+    """Generate the affiliate links of all channels with a single batched link.generate call"""
+    source_urls = build_channel_source_urls(product_id, resolved_link)
+    with timed_stage('link_generate'):
+        affiliate_links = aliexpress.get_affiliate_links(list(source_urls.values()))
+    promotion_links = {link.source_value: link.promotion_link for link in affiliate_links}
+    channel_links = {channel: promotion_links.get(source_url) for channel, source_url in source_urls.items()}
+    missing = [channel for channel, link in channel_links.items() if not link]
+    if missing:
+        logger.warning("❌ No affiliate link returned", extra=fields(product_id=product_id, channels=missing))
+    return channel_links
+
+# Define function to get the details shown in the reply
+def get_product_details(product_id):
+    with timed_stage('product_details'):
+        return aliexpress.get_products_details([product_id],
+                                               fields=["target_sale_price", "product_title", "product_main_image_url"])
+
+# Define function to build the affiliate links part of the reply
+def build_links_text(channel_links):
+    """Build the message text listing every available affiliate link"""
+    message_text = ""
+    if channel_links.get('coin'):
+        message_text += (
+            "💰 عرض العملات (السعر النهائي عند الدفع) : \n"
+            f"الرابط {channel_links['coin']} \n"
+        )
+    if channel_links.get('bundle'):
+        message_text += (
+            "📦 عرض الحزمة (عروض متنوعة) : \n"
+            f"الرابط {channel_links['bundle']} \n"
+        )
+    if channel_links.get('super'):
+        message_text += (
+            "💎 عرض السوبر : \n"
+            f"الرابط {channel_links['super']} \n"
+        )
+    if channel_links.get('limited'):
+        message_text += (
+            "🔥 عرض محدود : \n"
+            f"الرابط {channel_links['limited']} \n"
+        )
+    message_text += "\n#AliExpressSaverBot ✅"
+    return message_text
 
 # Define bot handlers
 @bot.message_handler(commands=['start'])
 def welcome_user(message):
-    print("Handling /start command")
+    logger.debug("Handling /start command")
     bot.send_message(
         message.chat.id,
         "مرحبا بكم👋 \n" 
@@ -180,7 +561,7 @@ def welcome_user(message):
 @bot.message_handler(func=lambda message: True)
 def echo_all(message):
     try:
-        print(f"Message received: {message.text}")
+        logger.debug("Message received", extra=fields(text=message.text))
         link = extract_link(message.text)
         sent_message = bot.send_message(message.chat.id, 'المرجو الانتظار قليلا، يتم تجهيز العروض ⏳')
         message_id = sent_message.message_id
@@ -194,14 +575,13 @@ def echo_all(message):
             bot.send_message(message.chat.id, "الرابط غير صحيح ! تأكد من رابط المنتج أو اعد المحاولة.\n"
                                               " قم بإرسال <b> الرابط فقط</b> بدون عنوان المنتج",
                              parse_mode='HTML')
-    except Exception as e:
-        print(f"Error in echo_all handler: {e}")
+    except Exception:
+        logger.exception("Error in echo_all handler")
 
 def extract_link(text):
     link_pattern = r'https?://\S+|www\.\S+'
     links = re.findall(link_pattern, text)
     if links:
-        print(f"Extracted link: {links[0]}")
         return links[0]
     return None
 
@@ -214,39 +594,29 @@ def get_affiliate_links(message, message_id, link):
             bot.send_message(message.chat.id, "❌ لم أتمكن من حل الرابط! تأكد من رابط المنتج أو أعد المحاولة.")
             return
 
-        # Extract product ID from the resolved link
-        product_id = extract_product_id(resolved_link)
+        # Extract product ID from the resolved link, a link that failed to resolve is not walked again
+        product_id = extract_product_id(resolved_link, resolved=True)
         if not product_id:
             bot.delete_message(message.chat.id, message_id)
             bot.send_message(message.chat.id, "❌ لم أتمكن من استخراج معرف المنتج من الرابط.")
             return
 
-        # Generate coin-index affiliate link for 620 channel
-        coin_affiliate_link = generate_coin_affiliate_link(product_id)
-        
-        # Generate bundle affiliate link for 560 channel
-        bundle_affiliate_link = generate_bundle_affiliate_link(product_id, resolved_link)
-        
-        # Generate other affiliate links using traditional method
-        super_links = aliexpress.get_affiliate_links(
-            f'https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail&redirectUrl={resolved_link}?sourceType=562&aff_fcid='
-        )
-        super_links = super_links[0].promotion_link
+        # Once the product ID is known, links and details are independent
+        links_future = submit_call(generate_channel_affiliate_links, product_id, resolved_link)
+        details_future = submit_call(get_product_details, product_id)
 
-        limit_links = aliexpress.get_affiliate_links(
-            f'https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail&redirectUrl={resolved_link}?sourceType=561&aff_fcid='
-        )
-        limit_links = limit_links[0].promotion_link
+        # Generate the affiliate links of all channels in one batched call
+        channel_links = links_future.result()
+        links_text = build_links_text(channel_links)
 
         try:
             # Get product details using the product ID
-            product_details = aliexpress.get_products_details([
-                product_id
-            ], fields=["target_sale_price", "product_title", "product_main_image_url"])
+            product_details = details_future.result()
             
             if product_details and len(product_details) > 0:
-                # Print all details of product in JSON format for debugging
-                print(f"Product details object: {json.dumps(product_details[0].__dict__, indent=2, ensure_ascii=False)}")
+                # Full product details of a sample of updates, serialized by the log listener
+                if payload_sampled():
+                    logger.debug("Product details object", extra=fields(product=product_details[0].to_dict()))
                 price_pro = float(product_details[0].target_sale_price)
                 title_link = product_details[0].product_title
                 img_link = product_details[0].product_main_image_url
@@ -258,7 +628,7 @@ def get_affiliate_links(message, message_id, link):
                 else:
                     price_pro_mad = price_pro  # fallback to USD if exchange rate not available
                 
-                print(f"Product details: {title_link}, {price_pro}, {img_link}")
+                logger.debug("Product details", extra=fields(product_id=product_id, title=title_link, price=price_pro))
                 bot.delete_message(message.chat.id, message_id)
                 
                 # Build the message with all affiliate links
@@ -268,29 +638,7 @@ def get_affiliate_links(message, message_id, link):
                     f" سعر المنتج : "
                     f" {price_pro:.2f} دولار 💵 / {price_pro_mad:.2f} درهم مغربي 💵\n"
                     " \n قارن بين الاسعار واشتري 🔥 \n"
-                )
-                
-                # Add coin-index affiliate link for 620 channel if available
-                if coin_affiliate_link:
-                    message_text += (
-                        "💰 عرض العملات (السعر النهائي عند الدفع) : \n"
-                        f"الرابط {coin_affiliate_link} \n"
-                    )
-                
-                # Add bundle affiliate link for 560 channel if available
-                if bundle_affiliate_link:
-                    message_text += (
-                        "📦 عرض الحزمة (عروض متنوعة) : \n"
-                        f"الرابط {bundle_affiliate_link} \n"
-                    )
-                
-                message_text += (
-                    f"💎 عرض السوبر : \n"
-                    f"الرابط {super_links} \n"
-                    f"🔥 عرض محدود : \n"
-                    f"الرابط {limit_links} \n\n"
-                    "#AliExpressSaverBot ✅"
-                )
+                ) + links_text
                 
                 bot.send_photo(message.chat.id,
                                img_link,
@@ -301,63 +649,19 @@ def get_affiliate_links(message, message_id, link):
                 bot.delete_message(message.chat.id, message_id)
                 
                 # Build fallback message without product details
-                message_text = "قارن بين الاسعار واشتري 🔥 \n"
-                
-                # Add coin-index affiliate link for 620 channel if available
-                if coin_affiliate_link:
-                    message_text += (
-                        "💰 عرض العملات (السعر النهائي عند الدفع) : \n"
-                        f"الرابط {coin_affiliate_link} \n"
-                    )
-                
-                # Add bundle affiliate link for 560 channel if available
-                if bundle_affiliate_link:
-                    message_text += (
-                        "📦 عرض الحزمة (عروض متنوعة) : \n"
-                        f"الرابط {bundle_affiliate_link} \n"
-                    )
-                
-                message_text += (
-                    f"💎 عرض السوبر : \n"
-                    f"الرابط {super_links} \n"
-                    f"🔥 عرض محدود : \n"
-                    f"الرابط {limit_links} \n\n"
-                    "#AliExpressSaverBot ✅"
-                )
+                message_text = "قارن بين الاسعار واشتري 🔥 \n" + links_text
                 
                 bot.send_message(message.chat.id, message_text, reply_markup=keyboard)
-        except Exception as e:
-            print(f"Error in get_affiliate_links inner try: {e}")
+        except Exception:
+            logger.exception("Error getting product details", extra=fields(product_id=product_id))
             bot.delete_message(message.chat.id, message_id)
             
             # Build fallback message without product details but with all affiliate links
-            message_text = "قارن بين الاسعار واشتري 🔥 \n"
-            
-            # Add coin-index affiliate link for 620 channel if available
-            if coin_affiliate_link:
-                message_text += (
-                    "💰 عرض العملات (السعر النهائي عند الدفع) : \n"
-                    f"الرابط {coin_affiliate_link} \n"
-                )
-            
-            # Add bundle affiliate link for 560 channel if available
-            if bundle_affiliate_link:
-                message_text += (
-                    "📦 عرض الحزمة (عروض متنوعة) : \n"
-                    f"الرابط {bundle_affiliate_link} \n"
-                )
-            
-            message_text += (
-                f"💎 عرض السوبر : \n"
-                f"الرابط {super_links} \n"
-                f"🔥 عرض محدود : \n"
-                f"الرابط {limit_links} \n\n"
-                "#AliExpressSaverBot ✅"
-            )
+            message_text = "قارن بين الاسعار واشتري 🔥 \n" + links_text
             
             bot.send_message(message.chat.id, message_text, reply_markup=keyboard)
-    except Exception as e:
-        print(f"Error in get_affiliate_links: {e}")
+    except Exception:
+        logger.exception("Error in get_affiliate_links", extra=fields(link=link))
         bot.send_message(message.chat.id, "حدث خطأ 🤷🏻‍♂️")
 
 def build_shopcart_link(link):
@@ -384,14 +688,14 @@ def get_affiliate_shopcart_link(link, message):
         text2 = f"هذا رابط تخفيض السلة \n{str(affiliate_link)}"
         img_link3 = "https://i.postimg.cc/1Xrk1RJP/Copy-of-Basket-aliexpress-telegram.png"
         bot.send_photo(message.chat.id, img_link3, caption=text2)
-    except Exception as e:
-        print(f"Error in get_affiliate_shopcart_link: {e}")
+    except Exception:
+        logger.exception("Error in get_affiliate_shopcart_link")
         bot.send_message(message.chat.id, "حدث خطأ 🤷🏻‍♂️")
 
 @bot.callback_query_handler(func=lambda call: True)
 def handle_callback_query(call):
     try:
-        print(f"Callback query received: {call.data}")
+        logger.debug("Callback query received", extra=fields(data=call.data))
         if call.data == 'click':
             # Replace with your link and message if needed
             link = 'https://www.aliexpress.com/p/shoppingcart/index.html?'
@@ -403,24 +707,93 @@ def handle_callback_query(call):
                            img_link2,
                            caption="روابط ألعاب جمع العملات المعدنية لإستعمالها في خفض السعر لبعض المنتجات، قم بالدخول يوميا لها للحصول على أكبر عدد ممكن في اليوم 👇",
                            reply_markup=keyboard_games)
-    except Exception as e:
-        print(f"Error in handle_callback_query: {e}")
+    except Exception:
+        logger.exception("Error in handle_callback_query")
 
 # Flask app for handling webhook
 
 app = Flask(__name__)
 
+# Webhook updates are acknowledged at once and processed by the chat dispatcher
+WEBHOOK_QUEUE_TIMEOUT = float(os.getenv('WEBHOOK_QUEUE_TIMEOUT', '1'))
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     if request.method == 'POST':
         json_str = request.get_data().decode('UTF-8')
         update = telebot.types.Update.de_json(json_str)
-        bot.process_new_updates([update])
+        update_dispatcher.start()
+        try:
+            # Wait a moment for room in the queue, then push back so Telegram retries later
+            update_dispatcher.submit(update, timeout=WEBHOOK_QUEUE_TIMEOUT)
+        except queue.Full:
+            return 'Busy', 503
         return 'OK', 200
 
-# Start Flask app in a separate thread
+@app.route('/webhook/queue', methods=['GET'])
+def webhook_queue():
+    return update_dispatcher.snapshot(), 200
+
+QUEUE_COUNTERS = ('received', 'rejected', 'processed', 'failed')
+LIMITER_COUNTERS = ('acquired', 'rejected', 'waited')
+
+def rate_limiter_snapshots():
+    limiters = {'telegram_global': telegram_global_limiter, 'telegram_chat': telegram_chat_limiter,
+                'aliexpress_api': aliexpress.rate_limiter}
+    return {name: limiter.snapshot() for name, limiter in limiters.items() if limiter is not None}
+
+def circuit_breaker_counter(stat):
+    if aliexpress.circuit_breaker is None:
+        return {}
+    return {(): aliexpress.circuit_breaker.snapshot()[stat]}
+
+def circuit_breaker_open():
+    if aliexpress.circuit_breaker is None:
+        return {}
+    return {(): int(aliexpress.circuit_breaker.snapshot()['state'] != 'closed')}
+
+# Counters kept by the dispatcher, the rate limiters and the circuit breaker, read on each scrape.
+# Values that only go up are counters, current levels are gauges.
+metrics.callback('bot_updates_total', 'Updates received, rejected, processed and failed by the dispatcher',
+                 'counter', ['result'],
+                 lambda: {(stat,): value for stat, value in update_dispatcher.snapshot().items()
+                          if stat in QUEUE_COUNTERS})
+metrics.callback('bot_update_queue', 'Update dispatcher depth, peak depth, active chats, capacity and workers',
+                 'gauge', ['stat'],
+                 lambda: {(stat,): value for stat, value in update_dispatcher.snapshot().items()
+                          if stat not in QUEUE_COUNTERS})
+metrics.callback('bot_rate_limiter_calls_total', 'Calls acquired, rejected and delayed by each rate limiter',
+                 'counter', ['limiter', 'result'],
+                 lambda: {(name, stat): stats[stat] for name, stats in rate_limiter_snapshots().items()
+                          for stat in LIMITER_COUNTERS})
+metrics.callback('bot_rate_limiter_wait_seconds_total', 'Seconds calls were delayed by each rate limiter',
+                 'counter', ['limiter'],
+                 lambda: {(name,): stats['wait_seconds_total'] for name, stats in rate_limiter_snapshots().items()})
+metrics.callback('bot_rate_limiter_wait_seconds_max', 'Longest delay of a call by each rate limiter',
+                 'gauge', ['limiter'],
+                 lambda: {(name,): stats['wait_seconds_max'] for name, stats in rate_limiter_snapshots().items()})
+for stat, documentation in (('failures', 'AliExpress API calls failed with a transient error'),
+                            ('opened', 'Times the AliExpress API circuit breaker opened'),
+                            ('rejected', 'AliExpress API calls failed fast by the open circuit breaker')):
+    metrics.callback(f'aliexpress_circuit_breaker_{stat}_total', documentation, 'counter',
+                     collect=lambda stat=stat: circuit_breaker_counter(stat))
+metrics.callback('aliexpress_circuit_breaker_open', 'Whether the AliExpress API circuit breaker is open (1) or not',
+                 'gauge', collect=circuit_breaker_open)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+@app.route('/rate-limits', methods=['GET'])
+def rate_limits():
+    return rate_limiter_snapshots(), 200
+
+# Start Flask app in a separate thread, served by waitress (the webhook only queues updates,
+# so a few threads answer Telegram while the update workers do the slow work)
 def run_flask():
-    app.run(host='0.0.0.0', port=5000)
+    import waitress  # only needed in webhook mode
+    waitress.serve(app, host='0.0.0.0', port=int(os.getenv('PORT', '5000')),
+                   threads=int(os.getenv('WEB_THREADS', '4')))
 
 if __name__ == "__main__":
     # Check if we're running in production (webhook) or development (polling) mode
@@ -428,26 +801,26 @@ if __name__ == "__main__":
     
     if webhook_url:
         # Production mode: Use webhook
-        print("🚀 Starting bot in webhook mode...")
+        logger.info("🚀 Starting bot in webhook mode...")
         threading.Thread(target=run_flask).start()
         try:
             bot.remove_webhook()
             bot.set_webhook(url=webhook_url)
-            print(f"✅ Webhook set to: {webhook_url}")
-        except Exception as e:
-            print(f"❌ Error setting webhook: {e}")
+            logger.info(f"✅ Webhook set to: {webhook_url}")
+        except Exception:
+            logger.exception("❌ Error setting webhook")
     else:
         # Development mode: Use polling
-        print("🚀 Starting bot in polling mode (development)...")
+        logger.info("🚀 Starting bot in polling mode (development)...")
         try:
             # Remove any existing webhook first
             bot.remove_webhook()
-            print("✅ Removed existing webhooks")
+            logger.info("✅ Removed existing webhooks")
             
             # Start polling
-            print("🔄 Bot is running... Press Ctrl+C to stop.")
+            logger.info("🔄 Bot is running... Press Ctrl+C to stop.")
             bot.infinity_polling(none_stop=True, timeout=10, long_polling_timeout=5)
         except KeyboardInterrupt:
-            print("\n👋 Bot stopped by user.")
-        except Exception as e:
-            print(f"❌ Error in polling mode: {e}")
+            logger.info("👋 Bot stopped by user.")
+        except Exception:
+            logger.exception("❌ Error in polling mode")
@@ -3,4 +3,5 @@
 __author__ = 'Sergio Abad'
 
 from .api import AliexpressApi
+from .async_api import AsyncAliexpressApi
 from .api import models
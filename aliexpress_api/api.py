@@ -6,15 +6,18 @@ API in an easier way.
 """
 
 from aliexpress_api.errors.exceptions import CategoriesNotFoudException
-from aliexpress_api.helpers.categories import filter_child_categories, filter_parent_categories
 from aliexpress_api.models.category import ChildCategory
-from .skd import setDefaultAppInfo
+from .skd import setDefaultAppInfo, appinfo
 from .skd import api as aliapi
 from .errors import ProductsNotFoudException, InvalidTrackingIdException
-from .helpers import api_request, parse_products, get_list_as_string, get_product_ids
+from .errors import ApiRequestException, ApiRequestResponseException
+from .helpers import api_request, parse_products, parse_categories, get_list_as_string, get_product_ids
+from .helpers import CategoryIndex
+from .tools import TTLCache, SQLiteCache, ProductCache, MicroBatcher, SingleFlight, RateLimiter
+from .tools import RetryPolicy, CircuitBreaker, iter_pages
 from . import models
 
-from typing import List, Union
+from typing import Iterator, List, Union
 
 
 class AliexpressApi:
@@ -26,6 +29,37 @@ class AliexpressApi:
         language (str): Language code. Defaults to EN.
         currency (str): Currency code. Defaults to USD.
         tracking_id (str): The tracking id for link generator. Defaults to None.
+        link_cache_ttl (int): Seconds a generated affiliate link is reused. 0 disables the cache.
+            Defaults to 86400.
+        link_cache_size (int): Maximum number of cached affiliate links. Defaults to 10000.
+        link_cache_path (str): Keep the affiliate link cache in this SQLite file instead of memory,
+            so it survives restarts. Defaults to None.
+        product_cache_size (int): Maximum number of cached products. Prices and availability can
+            then be up to the price TTL plus ``product_cache_stale_ttl`` old. Defaults to None, no cache.
+        product_cache_ttls (dict): Seconds each field group of a product stays fresh, see
+            ``tools.ProductCache``. Defaults to 7 days for ``static`` and 1 hour for ``price`` fields.
+        product_cache_stale_ttl (int): Seconds an expired product is still served while it is
+            refreshed. Defaults to 86400.
+        category_cache_path (str): Save the fetched categories to this JSON file and load them from it
+            on start, so no API call is needed after a restart. Defaults to None.
+        category_cache_ttl (int): Seconds the categories are reused before they are fetched again.
+            Defaults to 7 days.
+        product_batch_window (float): Seconds concurrent ``get_products_details`` calls are collected
+            into one API call. 0 disables batching. Defaults to 0.
+        product_batch_size (int): Maximum product IDs per batched API call. Defaults to 20.
+        rate_limit (float): Maximum API calls per second for this app key. Defaults to no limit.
+        rate_limit_burst (int): Calls allowed at once before pacing starts. Defaults to ``rate_limit``.
+        rate_limit_block (bool): Wait for a free slot (True) or raise ``RateLimitException`` at
+            once (False). Defaults to True.
+        max_retries (int): Retries of an API call failing with a transient error, with jittered
+            exponential backoff. 0 disables retries. Defaults to 2.
+        circuit_breaker_threshold (int): Consecutive failed API calls after which calls fail fast
+            with ``CircuitOpenException``. 0 disables the circuit breaker. Defaults to 5.
+        circuit_breaker_timeout (float): Seconds calls fail fast before one is tried again.
+            Defaults to 30.
+        transport (Transport): Sends the API calls of this client, e.g. a
+            ``skd.api.base.RecordReplayTransport`` to record calls and replay them offline.
+            Defaults to keep-alive HTTP connection pools.
     """
 
     def __init__(self,
@@ -35,6 +69,23 @@ class AliexpressApi:
         currency: models.Currency,
         tracking_id: str = None,
         app_signature: str = None,
+        link_cache_ttl: int = 86400,
+        link_cache_size: int = 10000,
+        link_cache_path: str = None,
+        product_cache_size: int = None,
+        product_cache_ttls: dict = None,
+        product_cache_stale_ttl: int = 86400,
+        category_cache_path: str = None,
+        category_cache_ttl: int = 7 * 86400,
+        product_batch_window: float = 0,
+        product_batch_size: int = 20,
+        rate_limit: float = None,
+        rate_limit_burst: int = None,
+        rate_limit_block: bool = True,
+        max_retries: int = 2,
+        circuit_breaker_threshold: int = 5,
+        circuit_breaker_timeout: float = 30,
+        transport=None,
         **kwargs):
         self._key = key
         self._secret = secret
@@ -43,9 +94,47 @@ class AliexpressApi:
         self._currency = currency
         self._app_signature = app_signature
         self.categories = None
+        self._category_cache_path = category_cache_path
+        self._category_cache_ttl = category_cache_ttl
+        self._category_index = None
+        if category_cache_path:
+            self._category_index = CategoryIndex.load(category_cache_path, category_cache_ttl)
+            if self._category_index is not None:
+                self.categories = self._category_index.categories
+        self._link_cache = None
+        if link_cache_ttl and link_cache_path:
+            self._link_cache = SQLiteCache(link_cache_path, link_cache_size, link_cache_ttl)
+        elif link_cache_ttl:
+            self._link_cache = TTLCache(link_cache_size, link_cache_ttl)
+        self._product_cache = None
+        if product_cache_size:
+            self._product_cache = ProductCache(product_cache_size, product_cache_ttls, product_cache_stale_ttl)
+        self._single_flight = SingleFlight()
+        self._product_batcher = None
+        if product_batch_window:
+            self._product_batcher = MicroBatcher(self._fetch_products_batch, product_batch_window, product_batch_size)
+        self.rate_limiter = None
+        if rate_limit:
+            self.rate_limiter = RateLimiter(rate_limit, rate_limit_burst, block=rate_limit_block)
+        self.retry_policy = RetryPolicy(max_retries) if max_retries else None
+        self.circuit_breaker = None
+        if circuit_breaker_threshold:
+            self.circuit_breaker = CircuitBreaker(circuit_breaker_threshold, circuit_breaker_timeout)
+        self.transport = transport
         setDefaultAppInfo(self._key, self._secret)
 
 
+    def _new_request(self, request_class):
+        # The limits of this client go with each request, so clients sharing an app key
+        # in one process keep their own
+        request = request_class()
+        request.set_app_info(appinfo(self._key, self._secret))
+        request.set_rate_limiter(self.rate_limiter)
+        request.set_resilience(self.retry_policy, self.circuit_breaker)
+        request.set_transport(self.transport)
+        return request
+
+
     def get_products_details(self,
         product_ids: Union[str, List[str]],
         fields: Union[str, List[str]] = None,
@@ -53,6 +142,10 @@ class AliexpressApi:
         **kwargs) -> List[models.Product]:
         """Get products information.
 
+        Identical concurrent calls share one request. Products are served from the product
+        cache while fresh. Expired ones are still served while they are refreshed in the
+        background, or when the API fails.
+
         Args:
             product_ids (``str | list[str]``): One or more links or product IDs.
             fields (``str | list[str]``): The fields to include in the results. Defaults to all.
@@ -68,10 +161,130 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
+        key = ('products_details', str(product_ids), str(fields), country)
+        return list(self._single_flight.do(key, self._get_products_details, product_ids, fields, country))
+
+
+    def _get_products_details(self, product_ids, fields, country):
+        if self._product_cache is None and self._product_batcher is None:
+            request = self._products_details_request(product_ids, fields, country)
+            response = api_request(request, 'aliexpress_affiliate_productdetail_get_response')
+            return self._parse_products_details(response)
+
+        if self._product_cache is None:
+            product_ids = get_product_ids(product_ids)
+            fetch_fields = self._fields_with_product_id(get_list_as_string(fields).split(',') if fields else None)
+            products = self._request_products_details(product_ids, fetch_fields, country)
+            return self._order_products(product_ids, products)
+
+        product_ids, field_list, products, stale_ids, missing_ids = \
+            self._get_cached_products(product_ids, fields, country)
+        fetch_fields = self._fields_with_product_id(field_list)
+
+        if stale_ids:
+            self._product_cache.refresh(
+                [self._product_cache_key(product_id, country) for product_id in stale_ids],
+                lambda keys: self._fetch_products_details([key[0] for key in keys], fetch_fields, country))
+
+        if missing_ids:
+            try:
+                products.update(self._request_products_details(missing_ids, fetch_fields, country))
+            except (ApiRequestException, ApiRequestResponseException):
+                self._get_expired_products(missing_ids, field_list, country, products)
+                if not products:
+                    raise
+
+        return self._order_products(product_ids, products)
+
+
+    def _fetch_products_details(self, product_ids, fields, country):
+        request = self._products_details_request(product_ids, fields, country)
+        response = api_request(request, 'aliexpress_affiliate_productdetail_get_response')
+        return self._store_cached_products(self._parse_products_details(response), fields, country)
+
+
+    def _request_products_details(self, product_ids, fields, country):
+        # Returns the found products by ID, coalesced with concurrent callers when batching is on
+        key = (tuple(fields) if fields else None, country)
+        if self._product_batcher is None:
+            return self._fetch_products_batch(key, product_ids)
+
+        results = self._product_batcher.submit(key, product_ids)
+        return {product_id: product for product_id, product in zip(product_ids, results) if product is not None}
+
+
+    def _fetch_products_batch(self, key, product_ids):
+        fields, country = key
+        try:
+            products = self._fetch_products_details(product_ids, list(fields) if fields else None, country)
+        except ProductsNotFoudException:
+            return {}
+        return {str(product.product_id): product for product in products}
+
+
+    def _product_cache_key(self, product_id, country):
+        return (str(product_id), country, self._currency, self._language)
+
+
+    def _fields_with_product_id(self, field_list):
+        # product_id is always fetched so products of a batch can be matched to their request
+        if field_list is None or 'product_id' in field_list:
+            return field_list
+        return field_list + ['product_id']
+
+
+    def _get_cached_products(self, product_ids, fields, country):
+        product_ids = get_product_ids(product_ids)
+        field_list = get_list_as_string(fields).split(',') if fields else None
+
+        products = {}
+        stale_ids = []
+        missing_ids = []
+        for product_id in product_ids:
+            if product_id in products or product_id in missing_ids:
+                continue
+            key = self._product_cache_key(product_id, country)
+            product, fresh = self._product_cache.lookup(key, field_list)
+            if product is None:
+                missing_ids.append(product_id)
+            else:
+                products[product_id] = product
+                if not fresh:
+                    stale_ids.append(product_id)
+
+        return product_ids, field_list, products, stale_ids, missing_ids
+
+
+    def _get_expired_products(self, product_ids, field_list, country, products):
+        # Used when the API fails: any cached version beats an error
+        for product_id in product_ids:
+            key = self._product_cache_key(product_id, country)
+            product, _ = self._product_cache.lookup(key, field_list, allow_expired=True)
+            if product is not None:
+                products[product_id] = product
+
+
+    def _store_cached_products(self, products, fields, country):
+        if self._product_cache is None:
+            return products
+        for product in products:
+            key = self._product_cache_key(product.product_id, country)
+            self._product_cache.store(key, product, fields)
+        return products
+
+
+    def _order_products(self, product_ids, products):
+        products = [products[product_id] for product_id in product_ids if product_id in products]
+        if not products:
+            raise ProductsNotFoudException('No products found with current parameters')
+        return products
+
+
+    def _products_details_request(self, product_ids, fields, country):
         product_ids = get_product_ids(product_ids)
         product_ids = get_list_as_string(product_ids)
 
-        request = aliapi.rest.AliexpressAffiliateProductdetailGetRequest()
+        request = self._new_request(aliapi.rest.AliexpressAffiliateProductdetailGetRequest)
         request.app_signature = self._app_signature
         request.fields = get_list_as_string(fields)
         request.product_ids = product_ids
@@ -79,12 +292,12 @@ class AliexpressApi:
         request.target_currency = self._currency
         request.target_language = self._language
         request.tracking_id = self._tracking_id
+        return request
 
-        response = api_request(request, 'aliexpress_affiliate_productdetail_get_response')
 
-        if response.current_record_count > 0:
-            response = parse_products(response.products.product)
-            return response
+    def _parse_products_details(self, response):
+        if response.get('current_record_count', 0) > 0:
+            return parse_products(response['products']['product'])
         else:
             raise ProductsNotFoudException('No products found with current parameters')
 
@@ -95,6 +308,9 @@ class AliexpressApi:
         **kwargs) -> List[models.AffiliateLink]:
         """Converts a list of links in affiliate links.
 
+        Identical concurrent calls share one request. Links converted before are served from the
+        link cache, only the others are sent to the API.
+
         Args:
             links (``str | list[str]``): One or more links to convert.
             link_type (``models.LinkType``): Choose between normal link with standard commission
@@ -110,21 +326,85 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
+        key = ('affiliate_links', str(links), link_type)
+        return list(self._single_flight.do(key, self._get_affiliate_links, links, link_type))
+
+
+    def _get_affiliate_links(self, links, link_type):
+        source_values, cached_links, missing_values = self._get_cached_affiliate_links(links, link_type)
+
+        fetched_links = []
+        if missing_values:
+            request = self._affiliate_links_request(missing_values, link_type)
+            try:
+                response = api_request(request, 'aliexpress_affiliate_link_generate_response')
+                fetched_links = self._parse_affiliate_links(response)
+            except ProductsNotFoudException:
+                if not cached_links:
+                    raise
+
+        return self._merge_affiliate_links(source_values, cached_links, fetched_links, link_type)
+
+
+    def _link_cache_key(self, source_value, link_type):
+        return f'{link_type}|{self._tracking_id}|{source_value}'
+
+
+    def _get_cached_affiliate_links(self, links, link_type):
+        if not self._tracking_id:
+            raise InvalidTrackingIdException('The tracking id is required for affiliate links')
+
+        source_values = get_list_as_string(links).split(',')
+        cached_links = {}
+        missing_values = []
+        for source_value in source_values:
+            if source_value in cached_links or source_value in missing_values:
+                continue
+            link = None
+            if self._link_cache is not None:
+                link = self._link_cache.get(self._link_cache_key(source_value, link_type))
+            if link is None:
+                missing_values.append(source_value)
+            else:
+                cached_links[source_value] = link
+
+        return source_values, cached_links, missing_values
+
+
+    def _merge_affiliate_links(self, source_values, cached_links, fetched_links, link_type):
+        # Fetched links are matched back by source value, any link the API returned
+        # under a different source value is kept at the end as received
+        links = dict(cached_links)
+        unmatched_links = []
+        for link in fetched_links:
+            source_value = getattr(link, 'source_value', None)
+            if source_value in source_values:
+                links[source_value] = link
+                if self._link_cache is not None:
+                    self._link_cache.set(self._link_cache_key(source_value, link_type), link)
+            else:
+                unmatched_links.append(link)
+
+        return [links[source_value] for source_value in source_values if source_value in links] + unmatched_links
+
+
+    def _affiliate_links_request(self, links, link_type):
         if not self._tracking_id:
             raise InvalidTrackingIdException('The tracking id is required for affiliate links')
 
         links = get_list_as_string(links)
 
-        request = aliapi.rest.AliexpressAffiliateLinkGenerateRequest()
+        request = self._new_request(aliapi.rest.AliexpressAffiliateLinkGenerateRequest)
         request.app_signature = self._app_signature
         request.source_values = links
         request.promotion_link_type = link_type
         request.tracking_id = self._tracking_id
+        return request
 
-        response = api_request(request, 'aliexpress_affiliate_link_generate_response')
 
-        if response.total_result_count > 0:
-            return response.promotion_links.promotion_link
+    def _parse_affiliate_links(self, response):
+        if response.get('total_result_count', 0) > 0:
+            return [models.AffiliateLink.from_dict(link) for link in response['promotion_links']['promotion_link']]
         else:
             raise ProductsNotFoudException('Affiliate links not available')
 
@@ -168,7 +448,17 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
-        request = aliapi.rest.AliexpressAffiliateHotproductQueryRequest()
+        request = self._hotproducts_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                            min_sale_price, page_no, page_size, platform_product_type,
+                                            ship_to_country, sort)
+        response = api_request(request, 'aliexpress_affiliate_hotproduct_query_response')
+        return self._parse_hotproducts(response)
+
+
+    def _hotproducts_request(self, category_ids, delivery_days, fields, keywords, max_sale_price,
+                             min_sale_price, page_no, page_size, platform_product_type,
+                             ship_to_country, sort, request_class=None):
+        request = self._new_request(request_class or aliapi.rest.AliexpressAffiliateHotproductQueryRequest)
         request.app_signature = self._app_signature
         request.category_ids = get_list_as_string(category_ids)
         request.delivery_days = str(delivery_days)
@@ -184,16 +474,180 @@ class AliexpressApi:
         request.target_currency = self._currency
         request.target_language = self._language
         request.tracking_id = self._tracking_id
+        return request
 
-        response = api_request(request, 'aliexpress_affiliate_hotproduct_query_response')
 
-        if response.current_record_count > 0:
-            response.products = parse_products(response.products.product)
+    def _parse_hotproducts(self, response):
+        if response.get('current_record_count', 0) > 0:
+            products = parse_products(response['products']['product'])
+            response = models.HotProductsResponse.from_dict(response)
+            response.products = products
             return response
         else:
             raise ProductsNotFoudException('No products found with current parameters')
 
 
+    def iter_hotproducts(self,
+        category_ids: Union[str, List[str]] = None,
+        delivery_days: int = None,
+        fields: Union[str, List[str]] = None,
+        keywords: str = None,
+        max_sale_price: int = None,
+        min_sale_price: int = None,
+        page_size: int = 50,
+        platform_product_type: models.ProductType = None,
+        ship_to_country: str = None,
+        sort: models.SortBy = None,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> Iterator[models.Product]:
+        """Iterate over the affiliated products with high commission, page after page.
+        The next pages are fetched in the background while the current one is consumed.
+
+        Args:
+            Same as ``get_hotproducts``, except ``page_no``, plus:
+            first_page (``int``): Page to start from. Defaults to 1.
+            max_pages (``int``): Maximum number of pages to fetch. Defaults to all.
+            prefetch (``int``): Maximum pages requested at once. Defaults to 2.
+
+        Returns:
+            ``Iterator[models.Product]``: The products of every page, in order. Stops without
+            error when no products are left, and fetches nothing more once closed.
+
+        Raises:
+            ``ApiRequestException``
+            ``ApiRequestResponseException``
+        """
+        def request(page_no):
+            return self._hotproducts_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                             min_sale_price, page_no, page_size, platform_product_type,
+                                             ship_to_country, sort)
+        return self._iter_products(request, 'aliexpress_affiliate_hotproduct_query_response',
+                                   page_size, first_page, max_pages, prefetch)
+
+
+    def iter_products(self,
+        category_ids: Union[str, List[str]] = None,
+        delivery_days: int = None,
+        fields: Union[str, List[str]] = None,
+        keywords: str = None,
+        max_sale_price: int = None,
+        min_sale_price: int = None,
+        page_size: int = 50,
+        platform_product_type: models.ProductType = None,
+        ship_to_country: str = None,
+        sort: models.SortBy = None,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> Iterator[models.Product]:
+        """Iterate over all affiliated products matching a search, page after page.
+        The next pages are fetched in the background while the current one is consumed.
+
+        Args:
+            Same as ``iter_hotproducts``.
+
+        Returns:
+            ``Iterator[models.Product]``: The products of every page, in order.
+
+        Raises:
+            ``ApiRequestException``
+            ``ApiRequestResponseException``
+        """
+        def request(page_no):
+            return self._products_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                          min_sale_price, page_no, page_size, platform_product_type,
+                                          ship_to_country, sort)
+        return self._iter_products(request, 'aliexpress_affiliate_product_query_response',
+                                   page_size, first_page, max_pages, prefetch)
+
+
+    def iter_hotproduct_download(self,
+        category_id: int,
+        country: str = None,
+        fields: Union[str, List[str]] = None,
+        locale_site: str = None,
+        page_size: int = 50,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> Iterator[models.Product]:
+        """Iterate over the hot products of a category, page after page.
+        The next pages are fetched in the background while the current one is consumed.
+
+        Args:
+            category_id (``int``): The category ID.
+            country (``str``): Returns the price according to the country's tax rate policy.
+            fields (``str | list[str]``): The fields to include in the results list. Defaults to all.
+            locale_site (``str``): The locale site, e.g. ``ru_site``.
+            page_size (``int``): Products on each page. Should be between 1 and 50. Defaults to 50.
+            first_page (``int``): Page to start from. Defaults to 1.
+            max_pages (``int``): Maximum number of pages to fetch. Defaults to all.
+            prefetch (``int``): Maximum pages requested at once. Defaults to 2.
+
+        Returns:
+            ``Iterator[models.Product]``: The products of every page, in order.
+
+        Raises:
+            ``ApiRequestException``
+            ``ApiRequestResponseException``
+        """
+        def request(page_no):
+            return self._hotproduct_download_request(category_id, country, fields, locale_site,
+                                                     page_no, page_size)
+        return self._iter_products(request, 'aliexpress_affiliate_hotproduct_download_response',
+                                   page_size, first_page, max_pages, prefetch)
+
+
+    def _iter_products(self, request, response_name, page_size, first_page, max_pages, prefetch):
+        def fetch(page_no):
+            return self._parse_page(api_request(request(page_no), response_name), page_no, page_size)
+
+        pages = iter_pages(fetch, first_page, max_pages, prefetch)
+        try:
+            for page in pages:
+                yield from page.products
+        finally:
+            pages.close()
+
+
+    def _parse_page(self, response, page_no, page_size):
+        # Returns (page, last page number) for iter_pages, or (None, None) past the last page
+        try:
+            page = self._parse_hotproducts(response)
+        except ProductsNotFoudException:
+            return None, None
+        if response['current_record_count'] < page_size:
+            return page, page_no
+        total = response.get('total_record_count')
+        return page, -(-int(total) // page_size) if total else None
+
+
+    def _products_request(self, category_ids, delivery_days, fields, keywords, max_sale_price,
+                          min_sale_price, page_no, page_size, platform_product_type,
+                          ship_to_country, sort):
+        # product.query takes the same parameters as hotproduct.query
+        return self._hotproducts_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                         min_sale_price, page_no, page_size, platform_product_type,
+                                         ship_to_country, sort, aliapi.rest.AliexpressAffiliateProductQueryRequest)
+
+
+    def _hotproduct_download_request(self, category_id, country, fields, locale_site, page_no, page_size):
+        request = self._new_request(aliapi.rest.AliexpressAffiliateHotproductDownloadRequest)
+        request.app_signature = self._app_signature
+        request.category_id = category_id
+        request.country = country
+        request.fields = get_list_as_string(fields)
+        request.locale_site = locale_site
+        request.page_no = page_no
+        request.page_size = page_size
+        request.target_currency = self._currency
+        request.target_language = self._language
+        request.tracking_id = self._tracking_id
+        return request
+
+
     def get_categories(self, **kwargs) -> List[Union[models.Category, ChildCategory]]:
         """Get all available categories, both parent and child.
 
@@ -205,18 +659,32 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
-        request = aliapi.rest.AliexpressAffiliateCategoryGetRequest()
+        request = self._categories_request()
+        response = api_request(request, 'aliexpress_affiliate_category_get_response')
+        return self._parse_categories(response)
+
+
+    def _categories_request(self):
+        request = self._new_request(aliapi.rest.AliexpressAffiliateCategoryGetRequest)
         request.app_signature = self._app_signature
+        return request
 
-        response = api_request(request, 'aliexpress_affiliate_category_get_response')
 
-        if response.total_result_count > 0:
-            self.categories = response.categories.category
+    def _parse_categories(self, response):
+        if response.get('total_result_count', 0) > 0:
+            self._category_index = CategoryIndex(parse_categories(response['categories']['category']))
+            self.categories = self._category_index.categories
+            if self._category_cache_path:
+                self._category_index.save(self._category_cache_path)
             return self.categories
         else:
             raise CategoriesNotFoudException('No categories found')
 
 
+    def _has_cached_categories(self):
+        return self._category_index is not None and not self._category_index.is_expired(self._category_cache_ttl)
+
+
     def get_parent_categories(self, use_cache=True, **kwargs) -> List[models.Category]:
         """Get all available parent categories.
 
@@ -231,9 +699,9 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
-        if not use_cache or not self.categories:
+        if not use_cache or not self._has_cached_categories():
             self.get_categories()
-        return filter_parent_categories(self.categories)
+        return list(self._category_index.parents)
 
 
     def get_child_categories(self, parent_category_id: int, use_cache=True, **kwargs) -> List[models.ChildCategory]:
@@ -251,6 +719,52 @@ class AliexpressApi:
             ``ApiRequestException``
             ``ApiRequestResponseException``
         """
-        if not use_cache or not self.categories:
+        if not use_cache or not self._has_cached_categories():
+            self.get_categories()
+        return self._category_index.get_children(parent_category_id)
+
+
+    def get_category(self, category_id: int, use_cache=True, **kwargs) -> Union[models.Category, ChildCategory]:
+        """Get a category by its id.
+
+        Args:
+            category_id (``int``): The category id.
+            use_cache (``bool``): Uses cached categories to reduce API requests.
+
+        Returns:
+            ``models.Category | models.ChildCategory``: The category.
+
+        Raises:
+            ``CategoriesNotFoudException``
+            ``ApiRequestException``
+            ``ApiRequestResponseException``
+        """
+        if not use_cache or not self._has_cached_categories():
             self.get_categories()
-        return filter_child_categories(self.categories, parent_category_id)
+        return self._find_category(self._category_index.by_id.get(category_id), category_id)
+
+
+    def get_category_by_name(self, category_name: str, use_cache=True, **kwargs) -> Union[models.Category, ChildCategory]:
+        """Get a category by its name, ignoring case.
+
+        Args:
+            category_name (``str``): The category name.
+            use_cache (``bool``): Uses cached categories to reduce API requests.
+
+        Returns:
+            ``models.Category | models.ChildCategory``: The category.
+
+        Raises:
+            ``CategoriesNotFoudException``
+            ``ApiRequestException``
+            ``ApiRequestResponseException``
+        """
+        if not use_cache or not self._has_cached_categories():
+            self.get_categories()
+        return self._find_category(self._category_index.get_by_name(category_name), category_name)
+
+
+    def _find_category(self, category, search):
+        if category is None:
+            raise CategoriesNotFoudException(f'Category not found: {search}')
+        return category
@@ -0,0 +1,223 @@
+"""AliExpress API wrapper for Python, asyncio version
+
+Same methods and models as ``AliexpressApi``, but every API call is a coroutine sent
+through a non-blocking connection pool, so one event loop can keep many requests in
+flight without a thread per call.
+"""
+
+from .api import AliexpressApi
+from .errors import ProductsNotFoudException, ApiRequestException, ApiRequestResponseException
+from .helpers import async_api_request
+from .tools import aiter_pages
+from . import models
+
+from typing import AsyncIterator, List, Union
+
+
+class AsyncAliexpressApi(AliexpressApi):
+    """Provides coroutines to get information from AliExpress using your API credentials.
+
+    Args:
+        key (str): Your API key.
+        secret (str): Your API secret.
+        language (str): Language code. Defaults to EN.
+        currency (str): Currency code. Defaults to USD.
+        tracking_id (str): The tracking id for link generator. Defaults to None.
+    """
+
+    async def get_products_details(self,
+        product_ids: Union[str, List[str]],
+        fields: Union[str, List[str]] = None,
+        country: str = None,
+        **kwargs) -> List[models.Product]:
+        """Get products information. See ``AliexpressApi.get_products_details``."""
+        if self._product_cache is None:
+            request = self._products_details_request(product_ids, fields, country)
+            response = await async_api_request(request, 'aliexpress_affiliate_productdetail_get_response')
+            return self._parse_products_details(response)
+
+        product_ids, field_list, products, stale_ids, missing_ids = \
+            self._get_cached_products(product_ids, fields, country)
+        fetch_fields = self._fields_with_product_id(field_list)
+
+        if stale_ids:
+            self._product_cache.refresh(
+                [self._product_cache_key(product_id, country) for product_id in stale_ids],
+                lambda keys: self._fetch_products_details([key[0] for key in keys], fetch_fields, country))
+
+        if missing_ids:
+            try:
+                request = self._products_details_request(missing_ids, fetch_fields, country)
+                response = await async_api_request(request, 'aliexpress_affiliate_productdetail_get_response')
+                fetched = self._store_cached_products(self._parse_products_details(response), fetch_fields, country)
+                for product in fetched:
+                    products[str(product.product_id)] = product
+            except ProductsNotFoudException:
+                if not products:
+                    raise
+            except (ApiRequestException, ApiRequestResponseException):
+                self._get_expired_products(missing_ids, field_list, country, products)
+                if not products:
+                    raise
+
+        return self._order_products(product_ids, products)
+
+
+    async def get_affiliate_links(self,
+        links: Union[str, List[str]],
+        link_type: models.LinkType = models.LinkType.NORMAL,
+        **kwargs) -> List[models.AffiliateLink]:
+        """Converts a list of links in affiliate links. See ``AliexpressApi.get_affiliate_links``."""
+        source_values, cached_links, missing_values = self._get_cached_affiliate_links(links, link_type)
+
+        fetched_links = []
+        if missing_values:
+            request = self._affiliate_links_request(missing_values, link_type)
+            try:
+                response = await async_api_request(request, 'aliexpress_affiliate_link_generate_response')
+                fetched_links = self._parse_affiliate_links(response)
+            except ProductsNotFoudException:
+                if not cached_links:
+                    raise
+
+        return self._merge_affiliate_links(source_values, cached_links, fetched_links, link_type)
+
+
+    async def get_hotproducts(self,
+        category_ids: Union[str, List[str]] = None,
+        delivery_days: int = None,
+        fields: Union[str, List[str]] = None,
+        keywords: str = None,
+        max_sale_price: int = None,
+        min_sale_price: int = None,
+        page_no: int = None,
+        page_size: int = None,
+        platform_product_type: models.ProductType = None,
+        ship_to_country: str = None,
+        sort: models.SortBy = None,
+        **kwargs) -> models.HotProductsResponse:
+        """Search for affiliated products with high commission. See ``AliexpressApi.get_hotproducts``."""
+        request = self._hotproducts_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                            min_sale_price, page_no, page_size, platform_product_type,
+                                            ship_to_country, sort)
+        response = await async_api_request(request, 'aliexpress_affiliate_hotproduct_query_response')
+        return self._parse_hotproducts(response)
+
+
+    def iter_hotproducts(self,
+        category_ids: Union[str, List[str]] = None,
+        delivery_days: int = None,
+        fields: Union[str, List[str]] = None,
+        keywords: str = None,
+        max_sale_price: int = None,
+        min_sale_price: int = None,
+        page_size: int = 50,
+        platform_product_type: models.ProductType = None,
+        ship_to_country: str = None,
+        sort: models.SortBy = None,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> AsyncIterator[models.Product]:
+        """Iterate over the affiliated products with high commission with ``async for``.
+        See ``AliexpressApi.iter_hotproducts``."""
+        def request(page_no):
+            return self._hotproducts_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                             min_sale_price, page_no, page_size, platform_product_type,
+                                             ship_to_country, sort)
+        return self._aiter_products(request, 'aliexpress_affiliate_hotproduct_query_response',
+                                    page_size, first_page, max_pages, prefetch)
+
+
+    def iter_products(self,
+        category_ids: Union[str, List[str]] = None,
+        delivery_days: int = None,
+        fields: Union[str, List[str]] = None,
+        keywords: str = None,
+        max_sale_price: int = None,
+        min_sale_price: int = None,
+        page_size: int = 50,
+        platform_product_type: models.ProductType = None,
+        ship_to_country: str = None,
+        sort: models.SortBy = None,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> AsyncIterator[models.Product]:
+        """Iterate over all affiliated products matching a search with ``async for``.
+        See ``AliexpressApi.iter_products``."""
+        def request(page_no):
+            return self._products_request(category_ids, delivery_days, fields, keywords, max_sale_price,
+                                          min_sale_price, page_no, page_size, platform_product_type,
+                                          ship_to_country, sort)
+        return self._aiter_products(request, 'aliexpress_affiliate_product_query_response',
+                                    page_size, first_page, max_pages, prefetch)
+
+
+    def iter_hotproduct_download(self,
+        category_id: int,
+        country: str = None,
+        fields: Union[str, List[str]] = None,
+        locale_site: str = None,
+        page_size: int = 50,
+        first_page: int = 1,
+        max_pages: int = None,
+        prefetch: int = 2,
+        **kwargs) -> AsyncIterator[models.Product]:
+        """Iterate over the hot products of a category with ``async for``.
+        See ``AliexpressApi.iter_hotproduct_download``."""
+        def request(page_no):
+            return self._hotproduct_download_request(category_id, country, fields, locale_site,
+                                                     page_no, page_size)
+        return self._aiter_products(request, 'aliexpress_affiliate_hotproduct_download_response',
+                                    page_size, first_page, max_pages, prefetch)
+
+
+    async def _aiter_products(self, request, response_name, page_size, first_page, max_pages, prefetch):
+        async def fetch(page_no):
+            response = await async_api_request(request(page_no), response_name)
+            return self._parse_page(response, page_no, page_size)
+
+        pages = aiter_pages(fetch, first_page, max_pages, prefetch)
+        try:
+            async for page in pages:
+                for product in page.products:
+                    yield product
+        finally:
+            await pages.aclose()
+
+
+    async def get_categories(self, **kwargs) -> List[Union[models.Category, models.ChildCategory]]:
+        """Get all available categories, both parent and child. See ``AliexpressApi.get_categories``."""
+        request = self._categories_request()
+        response = await async_api_request(request, 'aliexpress_affiliate_category_get_response')
+        return self._parse_categories(response)
+
+
+    async def get_parent_categories(self, use_cache=True, **kwargs) -> List[models.Category]:
+        """Get all available parent categories. See ``AliexpressApi.get_parent_categories``."""
+        if not use_cache or not self._has_cached_categories():
+            await self.get_categories()
+        return list(self._category_index.parents)
+
+
+    async def get_child_categories(self, parent_category_id: int, use_cache=True, **kwargs) -> List[models.ChildCategory]:
+        """Get all available child categories for a specific parent category.
+        See ``AliexpressApi.get_child_categories``."""
+        if not use_cache or not self._has_cached_categories():
+            await self.get_categories()
+        return self._category_index.get_children(parent_category_id)
+
+
+    async def get_category(self, category_id: int, use_cache=True, **kwargs) -> Union[models.Category, models.ChildCategory]:
+        """Get a category by its id. See ``AliexpressApi.get_category``."""
+        if not use_cache or not self._has_cached_categories():
+            await self.get_categories()
+        return self._find_category(self._category_index.by_id.get(category_id), category_id)
+
+
+    async def get_category_by_name(self, category_name: str, use_cache=True, **kwargs) -> Union[models.Category, models.ChildCategory]:
+        """Get a category by its name, ignoring case. See ``AliexpressApi.get_category_by_name``."""
+        if not use_cache or not self._has_cached_categories():
+            await self.get_categories()
+        return self._find_category(self._category_index.get_by_name(category_name), category_name)
@@ -39,3 +39,11 @@ class CategoriesNotFoudException(AliexpressException):
 class InvalidTrackingIdException(AliexpressException):
     """Raised if the tracking ID is not present or invalid"""
     pass
+
+class RateLimitException(AliexpressException):
+    """Raised if a rate limiter has no token available and the caller does not wait"""
+    pass
+
+class CircuitOpenException(ApiRequestException):
+    """Raised while the circuit breaker is open and calls to AliExpress API fail fast"""
+    pass
@@ -1,4 +1,4 @@
-from .requests import api_request
+from .requests import api_request, async_api_request, parse_response
 from .arguments import get_list_as_string, get_product_ids
 from .products import parse_products
-from .categories import filter_parent_categories, filter_child_categories
+from .categories import filter_parent_categories, filter_child_categories, parse_categories, CategoryIndex
@@ -1,7 +1,20 @@
+import json
+import logging
+import os
+import time
 from typing import List, Union
 from .. import models
 
 
+logger = logging.getLogger(__name__)
+
+
+def parse_categories(categories) -> List[Union[models.Category, models.ChildCategory]]:
+    return [models.ChildCategory.from_dict(category) if 'parent_category_id' in category
+            else models.Category.from_dict(category)
+            for category in categories]
+
+
 def filter_parent_categories(categories: List[Union[models.Category, models.ChildCategory]]) -> List[models.Category]:
     filtered_categories = []
 
@@ -21,3 +34,66 @@ def filter_child_categories(categories: List[Union[models.Category, models.Child
             filtered_categories.append(category)
 
     return filtered_categories
+
+
+class CategoryIndex:
+    """Categories indexed by ID, by parent and by name, so every lookup is a dict access.
+
+    The index can be saved to and loaded from a JSON file so a restart does not need
+    the API while the saved categories are younger than ``ttl`` seconds.
+    """
+
+    def __init__(self, categories: List[Union[models.Category, models.ChildCategory]], fetched_at: float = None):
+        self.categories = categories
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.by_id = {}
+        self.by_name = {}
+        self.parents = []
+        self.children = {}
+        for category in categories:
+            self.by_id[category.category_id] = category
+            self.by_name[category.category_name.casefold()] = category
+            parent_category_id = getattr(category, 'parent_category_id', None)
+            if parent_category_id is None:
+                self.parents.append(category)
+            else:
+                self.children.setdefault(parent_category_id, []).append(category)
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at >= ttl
+
+    def get_children(self, parent_category_id: int) -> List[models.ChildCategory]:
+        return list(self.children.get(parent_category_id, []))
+
+    def get_by_name(self, category_name: str) -> Union[models.Category, models.ChildCategory, None]:
+        return self.by_name.get(category_name.casefold())
+
+    def save(self, path: str) -> bool:
+        """Saves the index to ``path``. Returns False if it could not be written, the index
+        is then only kept in memory."""
+        data = {
+            'fetched_at': self.fetched_at,
+            'categories': [category.to_dict() for category in self.categories],
+        }
+        temporary_path = path + '.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(temporary_path, path)
+        except OSError:
+            logger.warning('Could not save the categories to %s', path, exc_info=True)
+            return False
+        return True
+
+    @classmethod
+    def load(cls, path: str, ttl: float):
+        """Returns the index saved in ``path``, or None if it is missing, unreadable or expired."""
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+            index = cls(parse_categories(data['categories']), data['fetched_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if index.is_expired(ttl):
+            return None
+        return index
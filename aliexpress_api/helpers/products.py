@@ -1,12 +1,9 @@
-def parse_product(product):
-    product.product_small_image_urls = product.product_small_image_urls.string
-    return product
+from ..models import Product
 
 
-def parse_products(products):
-    new_products = []
+def parse_product(product):
+    return Product.from_dict(product)
 
-    for product in products:
-        new_products.append(parse_product(product))
 
-    return new_products
+def parse_products(products):
+    return [Product.from_dict(product) for product in products]
@@ -1,25 +1,44 @@
-from types import SimpleNamespace
-import json
+from ..errors import AliexpressException, ApiRequestException, ApiRequestResponseException
 
-from ..errors import ApiRequestException, ApiRequestResponseException
+
+def _request_exception(error):
+    if hasattr(error, 'message'):
+        return ApiRequestException(error.message)
+    return ApiRequestException(error)
+
+
+def parse_response(response, response_name):
+    """Returns the ``result`` dict of a parsed API response, models are built from it directly."""
+    try:
+        response = response[response_name]['resp_result']
+        resp_code = response['resp_code']
+    except Exception as error:
+        raise ApiRequestResponseException(error) from error
+
+    if resp_code == 200:
+        return response.get('result') or {}
+    else:
+        raise ApiRequestResponseException(f'Response code {resp_code} - {response.get("resp_msg")}')
 
 
 def api_request(request, response_name):
     try:
         response = request.getResponse()
+    except AliexpressException:
+        # Rate limit and open circuit breaker errors keep their type
+        raise
     except Exception as error:
-        if hasattr(error, 'message'):
-            raise ApiRequestException(error.message) from error
-        raise ApiRequestException(error) from error
+        raise _request_exception(error) from error
+
+    return parse_response(response, response_name)
+
 
+async def async_api_request(request, response_name):
     try:
-        response = response[response_name]['resp_result']
-        response = json.dumps(response)
-        response = json.loads(response, object_hook=lambda d: SimpleNamespace(**d))
+        response = await request.getResponseAsync()
+    except AliexpressException:
+        raise
     except Exception as error:
-        raise ApiRequestResponseException(error) from error
+        raise _request_exception(error) from error
 
-    if response.resp_code == 200:
-        return response.result
-    else:
-        raise ApiRequestResponseException(f'Response code {response.resp_code} - {response.resp_msg}')
+    return parse_response(response, response_name)
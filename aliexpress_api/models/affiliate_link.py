@@ -1,3 +1,7 @@
-class AffiliateLink:
+from .base import Model
+
+
+class AffiliateLink(Model):
+    __slots__ = ('promotion_link', 'source_value')
     promotion_link: str
     source_value: str
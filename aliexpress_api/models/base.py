@@ -0,0 +1,94 @@
+from typing import Any, Dict
+
+
+def _unwrap(value):
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, ResponseObject):
+        return dict(value._data)
+    if isinstance(value, list):
+        return [_unwrap(item) for item in value]
+    return value
+
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return ResponseObject(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+
+class ResponseObject:
+    """Attribute access to a nested response object. Deeper levels are converted on access."""
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return _wrap(self._data[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+    def __repr__(self):
+        return f'ResponseObject({self._data!r})'
+
+
+class Model:
+    """Base class of the response models.
+
+    Declared fields are stored in ``__slots__``. Fields the model does not declare are kept
+    as received and only converted to objects when they are accessed.
+    """
+    __slots__ = ('_extra',)
+    _fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Declared fields of the class and its bases, in declaration order
+        cls._fields = {**cls._fields, **dict.fromkeys(cls.__dict__.get('__slots__', ()))}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        model = cls.__new__(cls)
+        fields = cls._fields
+        extra = None
+        for name, value in data.items():
+            if name in fields:
+                setattr(model, name, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+        model._extra = extra
+        return model
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        extra = self._extra
+        if extra is None or name not in extra:
+            raise AttributeError(name)
+        value = extra[name]
+        if isinstance(value, (dict, list)):
+            value = extra[name] = _wrap(value)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        for name in self._fields:
+            if hasattr(self, name):
+                data[name] = _unwrap(getattr(self, name))
+        for name, value in (self._extra or {}).items():
+            data[name] = _unwrap(value)
+        return data
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
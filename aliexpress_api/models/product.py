@@ -1,7 +1,8 @@
+from .base import Model
 from typing import List
 
 
-class Product:
+class Product(Model):
     app_sale_price: str
     app_sale_price_currency: str
     commission_rate: str
@@ -11,7 +12,6 @@ class Product:
     first_level_category_name: str
     lastest_volume: int
     hot_product_commission_rate: str
-    lastest_volume: int
     original_price: str
     original_price_currency: str
     product_detail_url: str
@@ -34,3 +34,14 @@ class Product:
     target_original_price_currency: str
     target_sale_price: str
     target_sale_price_currency: str
+
+    __slots__ = tuple(__annotations__)
+
+    @classmethod
+    def from_dict(cls, data):
+        product = super().from_dict(data)
+        # The API wraps the image list as {"string": [...]}
+        small_image_urls = data.get('product_small_image_urls')
+        if isinstance(small_image_urls, dict):
+            product.product_small_image_urls = small_image_urls.get('string')
+        return product
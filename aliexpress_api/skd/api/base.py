@@ -6,13 +6,18 @@ Created on 2012-7-3
 """
 
 
+import abc
+import asyncio
 import hashlib
 import http.client as httplib
 import itertools
 import json
 import mimetypes
+import select
+import threading
 import time
 import urllib
+import weakref
 
 """
 定义一些系统变量
@@ -39,6 +44,9 @@ P_SUB_MSG = "sub_msg"
 
 N_REST = "/sync"
 
+POOL_MAXSIZE = 10
+POOL_IDLE_TIMEOUT = 60
+
 
 def sign(secret, parameters):
     # ===========================================================================
@@ -185,11 +193,530 @@ class RequestException(Exception):
     pass
 
 
+class ConnectionPool(object):
+    # ===========================================================================
+    # Thread-safe keep-alive connection pool for one host
+    # @param maxsize: maximum number of open connections, callers wait for a free one
+    # @param idle_timeout: seconds after which an idle connection is closed
+    # ===========================================================================
+
+    def __init__(self, domain, port, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.domain = domain
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+
+    def _new_connection(self, timeout):
+        if self.port == 443:
+            return httplib.HTTPSConnection(self.domain, self.port, timeout=timeout)
+        return httplib.HTTPConnection(self.domain, self.port, timeout=timeout)
+
+    @staticmethod
+    def is_healthy(connection):
+        # An idle keep-alive socket must not be readable: data there means the
+        # server closed it (EOF) or sent something we did not ask for.
+        sock = connection.sock
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _get_idle(self):
+        now = time.time()
+        with self._lock:
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if now - last_used < self.idle_timeout and self.is_healthy(connection):
+                    return connection
+                connection.close()
+        return None
+
+    def evict_idle(self):
+        # Close every idle connection unused for longer than idle_timeout
+        now = time.time()
+        with self._lock:
+            expired = [item for item in self._idle if now - item[1] >= self.idle_timeout]
+            self._idle = [item for item in self._idle if now - item[1] < self.idle_timeout]
+        for connection, _ in expired:
+            connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=30):
+        # =======================================================================
+        # Send a request on a pooled connection and return (response, body).
+        # A reused connection that turns out to be stale is replaced by a new
+        # one and the request is sent once more.
+        # =======================================================================
+        if not self._slots.acquire(timeout=timeout):
+            raise RequestException("connection pool for %s:%s is exhausted" % (self.domain, self.port))
+        try:
+            connection = self._get_idle()
+            reused = connection is not None
+            if not reused:
+                connection = self._new_connection(timeout)
+            while True:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                try:
+                    connection.request(method, url, body=body, headers=headers or {})
+                    response = connection.getresponse()
+                    result = response.read()
+                except (httplib.HTTPException, ConnectionError):
+                    connection.close()
+                    if not reused:
+                        raise
+                    reused = False
+                    connection = self._new_connection(timeout)
+                    continue
+                except Exception:
+                    connection.close()
+                    raise
+                break
+            if response.will_close:
+                connection.close()
+            else:
+                self.evict_idle()
+                with self._lock:
+                    self._idle.append((connection, time.time()))
+            return response, result
+        finally:
+            self._slots.release()
+
+
+_connection_pools = {}
+_connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(domain, port, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+    # ===========================================================================
+    # Return the shared connection pool of a host, creating it on first use
+    # ===========================================================================
+    with _connection_pools_lock:
+        pool = _connection_pools.get((domain, port))
+        if pool is None:
+            pool = ConnectionPool(domain, port, maxsize, idle_timeout)
+            _connection_pools[(domain, port)] = pool
+        return pool
+
+
+class AsyncResponse(object):
+    # ===========================================================================
+    # Status and headers of a response read by AsyncConnectionPool or served
+    # by RecordReplayTransport
+    # ===========================================================================
+
+    def __init__(self, status, headers):
+        self.status = status
+        self.headers = headers
+        self.will_close = headers.get("connection", "").lower() == "close"
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+
+class AsyncConnectionPool(object):
+    # ===========================================================================
+    # asyncio keep-alive connection pool for one host, the non-blocking
+    # counterpart of ConnectionPool. It speaks plain HTTP/1.1 over asyncio
+    # streams and belongs to the event loop it was created in.
+    # ===========================================================================
+
+    def __init__(self, domain, port, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.domain = domain
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(maxsize)
+
+    async def _new_connection(self):
+        return await asyncio.open_connection(self.domain, self.port, ssl=self.port == 443)
+
+    def _get_idle(self):
+        now = time.time()
+        while self._idle:
+            reader, writer, last_used = self._idle.pop()
+            if now - last_used < self.idle_timeout and not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def clear(self):
+        idle, self._idle = self._idle, []
+        for _, writer, _ in idle:
+            writer.close()
+
+    async def _send(self, reader, writer, method, url, body, headers):
+        body = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+        lines = ["%s %s HTTP/1.1" % (method, url), "Host: %s" % self.domain,
+                 "Content-Length: %d" % len(body)]
+        lines.extend("%s: %s" % (key, value) for key, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by %s" % self.domain)
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+        response = AsyncResponse(status, response_headers)
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            result = b"".join(chunks)
+        elif "content-length" in response_headers:
+            result = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            response.will_close = True
+            result = await reader.read()
+        return response, result
+
+    async def request(self, method, url, body=None, headers=None, timeout=30):
+        # =======================================================================
+        # Send a request on a pooled connection and return (response, body).
+        # A stale reused connection is replaced once, like ConnectionPool.
+        # =======================================================================
+        async with self._slots:
+            connection = self._get_idle()
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._new_connection(), timeout)
+                reader, writer = connection
+                try:
+                    response, result = await asyncio.wait_for(
+                        self._send(reader, writer, method, url, body, headers or {}), timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if not reused:
+                        raise
+                    reused = False
+                    connection = None
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                break
+            if response.will_close:
+                writer.close()
+            else:
+                self._idle.append((reader, writer, time.time()))
+            return response, result
+
+
+_async_connection_pools = weakref.WeakKeyDictionary()
+
+
+def get_async_connection_pool(domain, port, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+    # ===========================================================================
+    # Return the connection pool of a host for the running event loop
+    # ===========================================================================
+    pools = _async_connection_pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get((domain, port))
+    if pool is None:
+        pool = AsyncConnectionPool(domain, port, maxsize, idle_timeout)
+        pools[(domain, port)] = pool
+    return pool
+
+
+class Transport(abc.ABC):
+    # ===========================================================================
+    # Sends a signed request to the gateway and returns (response, body), the
+    # response providing status and getheader(). RestApi builds the request with
+    # getRequest() and parses the result with parseResponse(), so a transport
+    # only moves bytes and any object with these methods can replace another.
+    # ===========================================================================
+
+    @abc.abstractmethod
+    def request(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        pass
+
+    async def request_async(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        # Transports without a non-blocking path run the blocking one in a thread
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.request(domain, port, method, url, body, headers, timeout)
+        )
+
+
+class PooledTransport(Transport):
+    # ===========================================================================
+    # HTTP over the shared keep-alive ConnectionPool of each host
+    # @param address: (host, port) every request is sent to instead of the
+    #                 domain of the request, e.g. a local stand-in of the gateway
+    # @param maxsize, idle_timeout: settings of the pools created by this transport
+    # ===========================================================================
+
+    def __init__(self, address=None, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.address = address
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+
+    def request(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        domain, port = self.address or (domain, port)
+        connection_pool = get_connection_pool(domain, port, self.maxsize, self.idle_timeout)
+        return connection_pool.request(method, url, body=body, headers=headers, timeout=timeout)
+
+
+class AsyncPooledTransport(PooledTransport):
+    # ===========================================================================
+    # PooledTransport whose coroutines use the AsyncConnectionPool of the running
+    # event loop instead of a thread, the default transport
+    # ===========================================================================
+
+    async def request_async(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        domain, port = self.address or (domain, port)
+        connection_pool = get_async_connection_pool(domain, port, self.maxsize, self.idle_timeout)
+        return await connection_pool.request(method, url, body=body, headers=headers, timeout=timeout)
+
+
+class RecordReplayTransport(Transport):
+    # ===========================================================================
+    # Records gateway responses to a JSON lines file and serves them back
+    # @param path: file holding one recorded response per line
+    # @param mode: "record" sends every request through transport and appends
+    #              its response to the file, "replay" only serves recorded
+    #              responses and raises RequestException for any other request,
+    #              "auto" replays what it has and records the rest. "record"
+    #              starts the file anew, the other modes load it.
+    # @param transport: transport used to record, defaults to AsyncPooledTransport
+    #
+    # Requests are matched on their method and parameters without the timestamp
+    # and the sign, which change on every call. Several responses recorded for
+    # the same request are served in the order they were recorded, the last one
+    # repeating, so a replayed run is deterministic.
+    # ===========================================================================
+
+    MODES = ("record", "replay", "auto")
+    VOLATILE_PARAMETERS = (P_TIMESTAMP, P_SIGN)
+
+    def __init__(self, path, mode="replay", transport=None):
+        if mode not in self.MODES:
+            raise ValueError("mode must be one of %s" % ", ".join(self.MODES))
+        self.path = path
+        self.mode = mode
+        self.transport = transport or AsyncPooledTransport()
+        self._recorded = {}
+        self._served = {}
+        self._lock = threading.Lock()
+        if mode == "record":
+            open(path, "w").close()
+        else:
+            self.load()
+
+    def load(self):
+        self._recorded = {}
+        self._served = {}
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recorded.setdefault(entry["key"], []).append(entry)
+        except FileNotFoundError:
+            if self.mode == "replay":
+                raise
+
+    def request_key(self, method, url, body):
+        path, _, query = url.partition("?")
+        parameters = [
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(query, keep_blank_values=True)
+            if key not in self.VOLATILE_PARAMETERS
+        ]
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        if body and "=" in body and not body.startswith("--"):
+            parameters.extend(urllib.parse.parse_qsl(body, keep_blank_values=True))
+            body = None
+        return json.dumps([method, path, sorted(parameters), body], ensure_ascii=False)
+
+    def replay(self, key):
+        with self._lock:
+            entries = self._recorded.get(key)
+            if not entries:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+        return AsyncResponse(entry["status"], entry["headers"]), entry["body"].encode("utf-8")
+
+    def record(self, key, response, result):
+        if isinstance(response, AsyncResponse):
+            headers = dict(response.headers)
+        else:
+            headers = dict((name.lower(), value) for name, value in response.getheaders())
+        entry = {
+            "key": key,
+            "status": response.status,
+            "headers": headers,
+            "body": result.decode("utf-8", "replace"),
+        }
+        with self._lock:
+            self._recorded.setdefault(key, []).append(entry)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _replayed(self, method, url, body):
+        key = self.request_key(method, url, body)
+        replayed = self.replay(key) if self.mode != "record" else None
+        if replayed is None and self.mode == "replay":
+            raise RequestException("no recorded response for " + key)
+        return key, replayed
+
+    def request(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        key, replayed = self._replayed(method, url, body)
+        if replayed is not None:
+            return replayed
+        response, result = self.transport.request(domain, port, method, url, body, headers, timeout)
+        self.record(key, response, result)
+        return response, result
+
+    async def request_async(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        key, replayed = self._replayed(method, url, body)
+        if replayed is not None:
+            return replayed
+        response, result = await self.transport.request_async(
+            domain, port, method, url, body, headers, timeout
+        )
+        self.record(key, response, result)
+        return response, result
+
+
+_default_transport = AsyncPooledTransport()
+
+
+def set_default_transport(transport):
+    # ===========================================================================
+    # Send the requests without a transport of their own through transport,
+    # None restores the default AsyncPooledTransport
+    # ===========================================================================
+    global _default_transport
+    _default_transport = transport or AsyncPooledTransport()
+
+
+class RequestSchema(object):
+    # ===========================================================================
+    # Parameters of a request class, worked out once instead of on every call
+    # and worked out again when the attributes of the request change
+    # @param attributes: attribute names of the request, in definition order
+    # @param multipart: names of the file parameters, sent as multipart form
+    # @param translate: parameter names to send under another name
+    #
+    # For each app key and api name the parameter names are also sorted once,
+    # with the "keyvalue" text of the system parameters that never change,
+    # and the query string is split around the timestamp, so signing a request
+    # only folds in the values of the call.
+    # ===========================================================================
+
+    STATIC_PARAMETERS = (P_FORMAT, P_APPKEY, P_SIGN_METHOD, P_VERSION, P_PARTNER_ID, P_API)
+
+    def __init__(self, attributes, multipart, translate):
+        self.attributes = frozenset(attributes)
+        self.parameters = []
+        for key in attributes:
+            if key.startswith("__") or key in multipart or key.startswith("_RestApi__"):
+                continue
+            name = key[1:] if key.startswith("_") else key
+            self.parameters.append((key, translate.get(name, name)))
+        self._templates = {}
+
+    def application_parameters(self, attributes):
+        return {
+            name: attributes[key]
+            for key, name in self.parameters
+            if attributes[key] is not None
+        }
+
+    def template(self, app_key, api_name):
+        # =======================================================================
+        # Return (sign layout, query head, query tail) of app_key and api_name
+        # =======================================================================
+        template = self._templates.get((app_key, api_name))
+        if template is None:
+            static = {
+                P_FORMAT: "json",
+                P_APPKEY: app_key,
+                P_SIGN_METHOD: "md5",
+                P_VERSION: "2.0",
+                P_PARTNER_ID: SYSTEM_GENERATE_VERSION,
+                P_API: api_name,
+            }
+            names = set(static)
+            names.update((P_TIMESTAMP, P_SESSION))
+            names.update(name for _, name in self.parameters)
+            layout = [
+                (name, "%s%s" % (name, static[name]) if name in static else None)
+                for name in sorted(names)
+            ]
+            head = urllib.parse.urlencode(
+                [(key, static[key]) for key in (P_FORMAT, P_APPKEY, P_SIGN_METHOD, P_VERSION)]
+            )
+            tail = urllib.parse.urlencode([(key, static[key]) for key in (P_PARTNER_ID, P_API)])
+            template = (layout, N_REST + "?" + head + "&" + P_TIMESTAMP + "=", "&" + tail)
+            self._templates[(app_key, api_name)] = template
+        return template
+
+    def sign(self, secret, layout, application_parameter, timestamp, session=None):
+        # =======================================================================
+        # Same result as sign(secret, system and application parameters)
+        # =======================================================================
+        parts = [secret]
+        for name, static in layout:
+            # Application parameters take precedence, like dict.update in sign()
+            value = application_parameter.get(name)
+            if value is None:
+                if static is not None:
+                    parts.append(static)
+                    continue
+                if name == P_TIMESTAMP:
+                    value = timestamp
+                elif name == P_SESSION:
+                    value = session
+                if value is None:
+                    continue
+            parts.append("%s%s" % (name, value))
+        parts.append(secret)
+        return hashlib.md5("".join(parts).encode("utf-8")).hexdigest().upper()
+
+
+_request_schemas = {}
+
+
 class RestApi(object):
     # ===========================================================================
     # Rest api的基类
     # ===========================================================================
 
+    # Failed calls are only retried for requests that can safely be sent twice
+    idempotent = True
+
     def __init__(self, domain="api-sg.aliexpress.com", port=80):
         # =======================================================================
         # 初始化基类
@@ -199,6 +726,10 @@ class RestApi(object):
         self.__domain = domain
         self.__port = port
         self.__httpmethod = "POST"
+        self.__rate_limiter = None
+        self.__retry_policy = None
+        self.__circuit_breaker = None
+        self.__transport = None
         from .. import getDefaultAppInfo
 
         if getDefaultAppInfo():
@@ -221,6 +752,28 @@ class RestApi(object):
         self.__app_key = appinfo.appkey
         self.__secret = appinfo.secret
 
+    def set_rate_limiter(self, limiter):
+        # =======================================================================
+        # 设置请求的限流器, 由发送请求的客户端提供
+        # @param limiter: aliexpress_api.tools.RateLimiter, None 不限流
+        # =======================================================================
+        self.__rate_limiter = limiter
+
+    def set_resilience(self, retry_policy=None, circuit_breaker=None):
+        # =======================================================================
+        # 设置请求的重试策略和熔断器, 由发送请求的客户端提供
+        # @param retry_policy: aliexpress_api.tools.RetryPolicy, None 不重试
+        # @param circuit_breaker: aliexpress_api.tools.CircuitBreaker, None 不熔断
+        # =======================================================================
+        self.__retry_policy = retry_policy
+        self.__circuit_breaker = circuit_breaker
+
+    def set_transport(self, transport):
+        # =======================================================================
+        # 设置发送请求的 Transport, None 使用默认的 (set_default_transport)
+        # =======================================================================
+        self.__transport = transport
+
     def getapiname(self):
         return ""
 
@@ -233,37 +786,19 @@ class RestApi(object):
     def _check_requst(self):
         pass
 
-    def getResponse(self, authrize=None, timeout=30):
+    def getRequest(self, authrize=None):
         # =======================================================================
-        # 获取response结果
+        # 生成签名后的请求, 返回 (method, url, body, header)
         # =======================================================================
-        if self.__port == 443:
-            connection = httplib.HTTPSConnection(
-                self.__domain, self.__port, timeout=timeout
-            )
-        else:
-            connection = httplib.HTTPConnection(
-                self.__domain, self.__port, timeout=timeout
-            )
         timestamp_temp = "%.2f" % (float(time.time()))
         timestamp_temp = str(int(float(timestamp_temp) * 1000))
 
-        sys_parameters = {
-            P_FORMAT: "json",
-            P_APPKEY: self.__app_key,
-            P_SIGN_METHOD: "md5",
-            P_VERSION: "2.0",
-            P_TIMESTAMP: timestamp_temp,
-            P_PARTNER_ID: SYSTEM_GENERATE_VERSION,
-            P_API: self.getapiname(),
-        }
-        if authrize is not None:
-            sys_parameters[P_SESSION] = authrize
-        application_parameter = self.getApplicationParameters()
-        sign_parameter = sys_parameters.copy()
-        sign_parameter.update(application_parameter)
-        sys_parameters[P_SIGN] = sign(self.__secret, sign_parameter)
-        connection.connect()
+        schema = self.getSchema()
+        application_parameter = schema.application_parameters(self.__dict__)
+        layout, query_head, query_tail = schema.template(self.__app_key, self.getapiname())
+        sign_value = schema.sign(
+            self.__secret, layout, application_parameter, timestamp_temp, authrize
+        )
 
         header = self.get_request_header()
         if self.getMultipartParas():
@@ -279,17 +814,25 @@ class RestApi(object):
         else:
             body = urllib.parse.urlencode(application_parameter)
 
-        url = N_REST + "?" + urllib.parse.urlencode(sys_parameters)
-        connection.request(self.__httpmethod, url, body=body, headers=header)
-        response = connection.getresponse()
+        url = query_head + timestamp_temp + query_tail
+        if authrize is not None:
+            url += "&" + urllib.parse.urlencode({P_SESSION: authrize})
+        url += "&" + P_SIGN + "=" + sign_value
+        return self.__httpmethod, url, body, header
+
+    def parseResponse(self, response, result):
+        # =======================================================================
+        # 解析response结果, response 需提供 status 和 getheader()
+        # =======================================================================
         if response.status != 200:
-            raise RequestException(
+            error = RequestException(
                 "invalid http status "
                 + str(response.status)
                 + ",detail body:"
-                + response.read()
+                + result.decode("utf-8", "replace")
             )
-        result = response.read()
+            error.status = response.status
+            raise error
         jsonobj = json.loads(result)
         if "error_response" in jsonobj:
             error = TopException()
@@ -306,27 +849,113 @@ class RestApi(object):
             raise error
         return jsonobj
 
+    def getResponse(self, authrize=None, timeout=30):
+        # =======================================================================
+        # 获取response结果
+        # =======================================================================
+        limiter = self.__rate_limiter
+        retry_policy, breaker = self.getResilience()
+        transport = self.__transport or _default_transport
+        attempt = 0
+        # Breaker of a call let through whose outcome is not recorded yet
+        pending = None
+        try:
+            while True:
+                if limiter is not None:
+                    limiter.acquire()
+                if breaker is not None and attempt == 0:
+                    breaker.before_call()
+                    pending = breaker
+                try:
+                    method, url, body, header = self.getRequest(authrize)
+                    response, result = transport.request(
+                        self.__domain, self.__port, method, url, body, header, timeout
+                    )
+                    jsonobj = self.parseResponse(response, result)
+                except Exception as error:
+                    if not self.shouldRetry(error, attempt, retry_policy, breaker):
+                        pending = None
+                        raise
+                    time.sleep(retry_policy.delay(attempt))
+                    attempt += 1
+                    continue
+                pending = None
+                if breaker is not None:
+                    breaker.record()
+                return jsonobj
+        finally:
+            if pending is not None:
+                # Cancelled or interrupted, free the trial call of a half open breaker
+                pending.release()
+
+    async def getResponseAsync(self, authrize=None, timeout=30):
+        # =======================================================================
+        # 获取response结果, 不阻塞事件循环
+        # =======================================================================
+        limiter = self.__rate_limiter
+        retry_policy, breaker = self.getResilience()
+        transport = self.__transport or _default_transport
+        attempt = 0
+        # Breaker of a call let through whose outcome is not recorded yet
+        pending = None
+        try:
+            while True:
+                if limiter is not None:
+                    wait = limiter.reserve()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                if breaker is not None and attempt == 0:
+                    breaker.before_call()
+                    pending = breaker
+                try:
+                    method, url, body, header = self.getRequest(authrize)
+                    response, result = await transport.request_async(
+                        self.__domain, self.__port, method, url, body, header, timeout
+                    )
+                    jsonobj = self.parseResponse(response, result)
+                except Exception as error:
+                    if not self.shouldRetry(error, attempt, retry_policy, breaker):
+                        pending = None
+                        raise
+                    await asyncio.sleep(retry_policy.delay(attempt))
+                    attempt += 1
+                    continue
+                pending = None
+                if breaker is not None:
+                    breaker.record()
+                return jsonobj
+        finally:
+            if pending is not None:
+                # Cancelled or interrupted, free the trial call of a half open breaker
+                pending.release()
+
+    def getResilience(self):
+        return self.__retry_policy, self.__circuit_breaker
+
+    def shouldRetry(self, error, attempt, retry_policy, breaker):
+        # =======================================================================
+        # 判断是否重试, 不再重试时把失败记入熔断器
+        # =======================================================================
+        retry = (
+            retry_policy is not None
+            and self.idempotent
+            and retry_policy.should_retry(error, attempt)
+        )
+        if not retry and breaker is not None:
+            breaker.record(error)
+        return retry
+
+    def getSchema(self):
+        # =======================================================================
+        # 返回请求类的参数结构, 属性不变时复用
+        # =======================================================================
+        schema = _request_schemas.get(type(self))
+        if schema is None or schema.attributes != self.__dict__.keys():
+            schema = RequestSchema(
+                list(self.__dict__), self.getMultipartParas(), self.getTranslateParas()
+            )
+            _request_schemas[type(self)] = schema
+        return schema
+
     def getApplicationParameters(self):
-        application_parameter = {}
-        for key in self.__dict__:
-            value = self.__dict__[key]
-            if (
-                not key.startswith("__")
-                and not key in self.getMultipartParas()
-                and not key.startswith("_RestApi__")
-                and value is not None
-            ):
-                if key.startswith("_"):
-                    application_parameter[key[1:]] = value
-                else:
-                    application_parameter[key] = value
-        # 查询翻译字典来规避一些关键字属性
-        translate_parameter = self.getTranslateParas()
-        for key in application_parameter:
-            value = application_parameter[key]
-            if key in translate_parameter:
-                application_parameter[translate_parameter[key]] = application_parameter[
-                    key
-                ]
-                del application_parameter[key]
-        return application_parameter
+        return self.getSchema().application_parameters(self.__dict__)
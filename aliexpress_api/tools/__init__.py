@@ -1 +1,9 @@
-from .get_product_id import get_product_id
+from .get_product_id import get_product_id, parse_product_id, is_short_link, unwrap_share_link
+from .cache import TTLCache, SQLiteCache
+from .product_cache import ProductCache
+from .batching import MicroBatcher
+from .singleflight import SingleFlight
+from .rate_limit import TokenBucket, RateLimiter
+from .resilience import RetryPolicy, CircuitBreaker, is_transient_error
+from .metrics import MetricsRegistry, Counter, Histogram, CallbackMetric
+from .pagination import iter_pages, aiter_pages
@@ -0,0 +1,70 @@
+"""Micro-batching of concurrent requests.
+
+Callers submit items under a batch key. The first caller of a new batch waits for
+``window`` seconds (or until ``max_size`` items are collected), then fetches the whole
+batch with one call and hands every caller the results of its own items. Other callers
+only wait for their results.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class _Batch:
+    def __init__(self):
+        self.futures = {}
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests for items into batched calls.
+
+    Args:
+        fetch (``callable``): ``fetch(key, items)`` returning a dict of item to result. Items
+            missing from the dict get None. An exception is raised to every caller of the batch.
+        window (``float``): Seconds a batch stays open for more items. Defaults to 0.02.
+        max_size (``int``): Items per call. A full batch is sent at once. Defaults to 20.
+    """
+
+    def __init__(self, fetch, window: float = 0.02, max_size: int = 20):
+        self.fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, items: list) -> list:
+        """Returns the results of ``items`` in order, blocking until their batch is fetched."""
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._batches[key] = batch
+            futures = [batch.futures.setdefault(item, Future()) for item in items]
+            if len(batch.futures) >= self.max_size:
+                del self._batches[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self._run(key, batch)
+
+        return [future.result() for future in futures]
+
+    def _run(self, key, batch):
+        items = list(batch.futures)
+        results = {}
+        try:
+            for start in range(0, len(items), self.max_size):
+                results.update(self.fetch(key, items[start:start + self.max_size]))
+        except BaseException as error:
+            for future in batch.futures.values():
+                future.set_exception(error)
+            return
+
+        for item, future in batch.futures.items():
+            future.set_result(results.get(item))
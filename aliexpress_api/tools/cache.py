@@ -0,0 +1,124 @@
+"""Size bounded caches with time to live.
+
+Both caches evict the least recently used entry once ``maxsize`` is reached and
+treat entries older than ``ttl`` seconds as missing. They are safe to share
+between threads.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """In-memory LRU cache with time to live.
+
+    Args:
+        maxsize (``int``): Maximum number of entries. Defaults to 1024.
+        ttl (``float``): Seconds an entry stays valid. Defaults to 3600.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk LRU cache with time to live, kept in a SQLite database so it survives restarts.
+
+    Keys must be strings, values can be anything that can be pickled.
+
+    Args:
+        path (``str``): Database file. Created if it does not exist.
+        maxsize (``int``): Maximum number of entries. Defaults to 10000.
+        ttl (``float``): Seconds an entry stays valid. Defaults to 86400.
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000, ttl: float = 86400):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS cache ('
+                                 'key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT value, expires_at FROM cache WHERE key = ?',
+                                           (key,)).fetchone()
+            if row is None:
+                return default
+            if row[1] <= now:
+                self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return default
+            self._connection.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        value = pickle.dumps(value)
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                                     (key, value, expires_at, now))
+            excess = self._count() - self.maxsize
+            if excess > 0:
+                self._connection.execute('DELETE FROM cache WHERE key IN '
+                                         '(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)', (excess,))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM cache')
+
+    def _count(self):
+        return self._connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
@@ -1,15 +1,67 @@
 """Some useful tools."""
 
 from ..errors import ProductIdNotFoundException
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
 import re
 
 
+SHORT_LINK_HOSTS = ('s.click.aliexpress.com', 'a.aliexpress.com', 'click.aliexpress.com')
+
+_ITEM_PATTERN = re.compile(r'/(?:item|i)/(?:[^/?#]*/)?(\d+)\.html')
+# Only parameters named after the product, a bare run of digits may be a timestamp (_t=1712345678901)
+_ID_PARAMETER_PATTERN = re.compile(r'[?&](?:productIds?|product_id|itemId|item_id)=(\d+)')
+
+
+def is_short_link(url: str) -> bool:
+    """Returns True if the link is an AliExpress short link that can only be resolved over the network."""
+    host = urlparse(url).hostname or ''
+    return host in SHORT_LINK_HOSTS
+
+
+def unwrap_share_link(url: str) -> str:
+    """Returns the ``redirectUrl`` of a star.aliexpress.com share link, or the link itself."""
+    if 'star.aliexpress.com' not in url:
+        return url
+    params = parse_qs(urlparse(url).query)
+    if 'redirectUrl' in params:
+        return params['redirectUrl'][0]
+    return url
+
+
+def parse_product_id(url: str) -> Optional[str]:
+    """Returns the product ID of a known AliExpress link shape without any network access,
+    or None if the link has to be resolved first."""
+    if is_short_link(url):
+        return None
+
+    url = unwrap_share_link(url)
+
+    # Product pages on any subdomain (www., m., es., ar., ...)
+    match = _ITEM_PATTERN.search(url)
+    if match:
+        return match.group(1)
+
+    # Coin page and app pages, product ID in a productIds, productId or itemId parameter
+    if 'aliexpress.' in url:
+        match = _ID_PARAMETER_PATTERN.search(url)
+        if match:
+            return match.group(1)
+
+    return None
+
+
 def get_product_id(text: str) -> str:
     """Returns the product ID from a given text. Raises ProductIdNotFoundException on fail."""
     # Return if text is a product ID
     if re.search(r'^[0-9]*$', text):
         return text
 
+    # Extract product ID from known link shapes
+    product_id = parse_product_id(text)
+    if product_id:
+        return product_id
+
     # Extract product ID from URL
     asin = re.search(r'(\/)([0-9]*)(\.)', text)
     if asin:
@@ -0,0 +1,91 @@
+"""Page iteration with prefetch.
+
+Pages are fetched in the background while the caller consumes the current one. Once a
+page tells how many pages there are, no page past the last one is requested. Until then
+up to ``prefetch`` pages are requested ahead. Stopping the iteration early (``break``,
+``close()``) cancels the pages not started yet and drops those still in flight.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Pages:
+    """Which page to request next, bounded by the last page once it is known."""
+
+    def __init__(self, first_page: int, max_pages: int, prefetch: int):
+        if prefetch < 1:
+            raise ValueError('prefetch must be at least 1')
+        self.next_page = first_page
+        self.last_page = first_page + max_pages - 1 if max_pages else None
+        self.prefetch = prefetch
+        self.started = False
+
+    def to_request(self, in_flight: int) -> list:
+        # The first page is requested alone, it usually tells how many pages there are
+        limit = self.prefetch if self.started else 1
+        pages = []
+        while in_flight + len(pages) < limit and (self.last_page is None or self.next_page <= self.last_page):
+            pages.append(self.next_page)
+            self.next_page += 1
+        return pages
+
+    def received(self, last_page):
+        self.started = True
+        if last_page is not None and (self.last_page is None or last_page < self.last_page):
+            self.last_page = last_page
+
+
+def iter_pages(fetch, first_page: int = 1, max_pages: int = None, prefetch: int = 2):
+    """Yields the pages returned by ``fetch`` in order, fetching the next ones in threads.
+
+    Args:
+        fetch (``callable``): ``fetch(page_no)`` returning ``(page, last_page_no)``. A page of
+            None ends the iteration, ``last_page_no`` is None while the number of pages is unknown.
+            An exception is raised by the iterator at the position of its page.
+        first_page (``int``): Page to start from. Defaults to 1.
+        max_pages (``int``): Maximum number of pages. Defaults to all.
+        prefetch (``int``): Maximum pages requested at once. Defaults to 2.
+    """
+    pages = _Pages(first_page, max_pages, prefetch)
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='prefetch')
+    pending = deque()
+    try:
+        pending.extend(executor.submit(fetch, page_no) for page_no in pages.to_request(0))
+        while pending:
+            page, last_page = pending.popleft().result()
+            if page is None:
+                return
+            pages.received(last_page)
+            # Request the next pages before handing this one over
+            pending.extend(executor.submit(fetch, page_no) for page_no in pages.to_request(len(pending)))
+            yield page
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_pages(fetch, first_page: int = 1, max_pages: int = None, prefetch: int = 2):
+    """Asyncio version of ``iter_pages``, ``fetch(page_no)`` being a coroutine function.
+
+    Pages are fetched in tasks of the running event loop. Call ``aclose()`` on the iterator
+    to stop it early, so the pages in flight are cancelled at once.
+    """
+    pages = _Pages(first_page, max_pages, prefetch)
+    pending = deque()
+    try:
+        pending.extend(asyncio.ensure_future(fetch(page_no)) for page_no in pages.to_request(0))
+        while pending:
+            page, last_page = await pending.popleft()
+            if page is None:
+                return
+            pages.received(last_page)
+            pending.extend(asyncio.ensure_future(fetch(page_no)) for page_no in pages.to_request(len(pending)))
+            yield page
+    finally:
+        for task in pending:
+            if not task.cancel() and not task.cancelled():
+                # Already finished, read its exception so it is not reported as never retrieved
+                task.exception()
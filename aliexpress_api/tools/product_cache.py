@@ -0,0 +1,136 @@
+"""Field-aware cache of product details.
+
+Titles and images almost never change while prices move within hours, so every
+field is cached with its own fetch time and judged against the TTL of its group.
+An entry past its TTL is still served for ``stale_ttl`` seconds while it is
+refreshed in the background, and without limit when the API fails.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..models import Product
+from .cache import TTLCache
+
+
+STATIC_FIELDS = frozenset([
+    'product_id',
+    'product_title',
+    'product_main_image_url',
+    'product_small_image_urls',
+    'product_video_url',
+    'product_detail_url',
+    'shop_id',
+    'shop_url',
+    'first_level_category_id',
+    'first_level_category_name',
+    'second_level_category_id',
+    'second_level_category_name',
+])
+
+DEFAULT_TTLS = {
+    'static': 7 * 86400,
+    'price': 3600,
+}
+
+
+class ProductCache:
+    """Product details cache with a TTL per field group and stale-while-revalidate.
+
+    Args:
+        maxsize (``int``): Maximum number of cached products. Defaults to 10000.
+        ttls (``dict``): Seconds each field group stays fresh, ``static`` for titles, images,
+            shop and categories and ``price`` for every other field. Defaults to 7 days and 1 hour.
+        stale_ttl (``float``): Seconds an expired entry is still served while it is refreshed.
+            Defaults to 86400.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttls: dict = None, stale_ttl: float = 86400):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.stale_ttl = stale_ttl
+        self._entries = TTLCache(maxsize, max(self.ttls.values()) + stale_ttl)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+
+    @staticmethod
+    def field_group(field: str) -> str:
+        return 'static' if field in STATIC_FIELDS else 'price'
+
+    def lookup(self, key, fields=None, allow_expired=False):
+        """Returns ``(product, fresh)``. ``product`` is None if it is not cached with all the
+        requested fields (or only too long ago), ``fresh`` is False if it should be refreshed."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+
+        now = time.time()
+        with self._lock:
+            names = fields or (list(entry['values']) if entry['complete'] is not None else None)
+            if names is None:
+                return None, False
+
+            values = {}
+            fresh = True
+            for name in names:
+                item = entry['values'].get(name)
+                if item is None and entry['complete'] is not None:
+                    # Fetched with all fields but not in the response, so the product has none
+                    item = (None, entry['complete'])
+                if item is None:
+                    return None, False
+                value, fetched_at = item
+                age = now - fetched_at
+                ttl = self.ttls[self.field_group(name)]
+                if age >= ttl:
+                    fresh = False
+                    if age >= ttl + self.stale_ttl and not allow_expired:
+                        return None, False
+                values[name] = value
+
+        return Product.from_dict(values), fresh
+
+    def store(self, key, product, fields=None):
+        """Stores the fields of a fetched product. ``fields`` None means all fields were fetched.
+        A requested field missing from the response is stored as empty, so it is not a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key) or {'values': {}, 'complete': None}
+            values = product.to_dict()
+            for name in fields or ():
+                values.setdefault(name, None)
+            for name, value in values.items():
+                entry['values'][name] = (value, now)
+            if not fields:
+                # Time all fields were fetched at
+                entry['complete'] = now
+            self._entries.set(key, entry)
+
+    def refresh(self, keys, fetch):
+        """Calls ``fetch(keys)`` in the background, skipping keys already being refreshed.
+        A failed refresh leaves the entries as they are."""
+        with self._lock:
+            keys = [key for key in keys if key not in self._refreshing]
+            if not keys:
+                return
+            self._refreshing.update(keys)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='product-cache')
+
+        def run():
+            try:
+                fetch(keys)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        self._executor.submit(run)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
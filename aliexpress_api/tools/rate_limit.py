@@ -0,0 +1,114 @@
+"""Token bucket rate limiters.
+
+A bucket holds up to ``capacity`` tokens and gains ``rate`` tokens per second. Each call
+takes one token. When the bucket is empty a caller either waits for the next token
+(queue-and-wait) or gets a ``RateLimitException`` right away (fail-fast).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from ..errors import RateLimitException
+
+
+class TokenBucket:
+    """A single token bucket.
+
+    Args:
+        rate (``float``): Tokens added per second, above 0.
+        capacity (``float``): Maximum burst of tokens. Defaults to ``rate`` (at least 1).
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError('rate must be positive, use no limiter for no limit')
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float = None):
+        """Takes a token and returns the seconds to wait before using it. Returns None without
+        taking a token if that wait would be longer than ``max_wait``."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class RateLimiter:
+    """Token bucket rate limiter, global or with one bucket per key (e.g. per chat).
+
+    Args:
+        rate (``float``): Calls per second, above 0.
+        capacity (``float``): Maximum burst. Defaults to ``rate`` (at least 1).
+        per_key (``bool``): Keep a bucket per key instead of one for all calls. Defaults to False.
+        block (``bool``): Default mode, wait for a token (True) or fail fast (False). Defaults to True.
+        timeout (``float``): Longest wait in blocking mode before failing. Defaults to no limit.
+        max_keys (``int``): Buckets kept in per key mode, least recently used ones are dropped.
+            Defaults to 10000.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, per_key: bool = False,
+                 block: bool = True, timeout: float = None, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.per_key = per_key
+        self.block = block
+        self.timeout = timeout
+        self.max_keys = max_keys
+        self.stats = {'acquired': 0, 'rejected': 0, 'waited': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0}
+        self._bucket = TokenBucket(rate, capacity)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, key):
+        if not self.per_key:
+            return self._bucket
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def reserve(self, key=None, block: bool = None, timeout: float = None) -> float:
+        """Takes a token and returns the seconds to wait before the call may be made.
+        Raises ``RateLimitException`` if the caller would have to wait and does not block,
+        or would wait longer than the timeout."""
+        block = self.block if block is None else block
+        max_wait = (self.timeout if timeout is None else timeout) if block else 0
+        wait = self._get_bucket(key).reserve(max_wait)
+        with self._lock:
+            if wait is None:
+                self.stats['rejected'] += 1
+            else:
+                self.stats['acquired'] += 1
+                if wait > 0:
+                    self.stats['waited'] += 1
+                    self.stats['wait_seconds_total'] += wait
+                    self.stats['wait_seconds_max'] = max(self.stats['wait_seconds_max'], wait)
+        if wait is None:
+            raise RateLimitException(f'Rate limit of {self.rate}/s exceeded' + (f' for {key}' if self.per_key else ''))
+        return wait
+
+    def acquire(self, key=None, block: bool = None, timeout: float = None) -> float:
+        """Waits for a token if needed and returns the seconds waited. See ``reserve``."""
+        wait = self.reserve(key, block, timeout)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,159 @@
+"""Retries and circuit breaking for API calls.
+
+Errors are split in transient ones (timeouts, dropped connections, 5xx and 429 statuses,
+platform and flow control ``TopException`` sub-codes), worth retrying after a short
+jittered backoff, and final ones (bad arguments, permissions), returned to the caller.
+A circuit breaker counts the transient errors left after the retries and, once too many
+happen in a row, fails calls at once for a while instead of waiting on a degraded service.
+"""
+
+import asyncio
+import http.client
+import random
+import socket
+import threading
+import time
+
+from ..errors import CircuitOpenException
+
+
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+RETRYABLE_SUBCODES = frozenset([
+    'isv.appkey-flow-limit',
+    'isv.api-flow-limit',
+    'accesscontrol.limited-by-app-access-count',
+    'accesscontrol.limited-by-api-access-count',
+    'accesscontrol.limited-by-dynamic-flow-control',
+])
+
+# Sub-codes of errors on the platform side (isp.remote-service-timeout, isp.unknown-error, ...)
+RETRYABLE_SUBCODE_PREFIXES = ('isp.',)
+
+# App call limit and remote service error
+RETRYABLE_ERROR_CODES = frozenset(['7', '15', '520'])
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Returns True if a failed API call may succeed when it is tried again."""
+    # asyncio.TimeoutError is only the builtin TimeoutError from Python 3.11 on
+    if isinstance(error, (socket.timeout, asyncio.TimeoutError, ConnectionError, http.client.HTTPException)):
+        return True
+
+    status = getattr(error, 'status', None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+
+    subcode = getattr(error, 'subcode', None)
+    if subcode:
+        return subcode in RETRYABLE_SUBCODES or subcode.startswith(RETRYABLE_SUBCODE_PREFIXES)
+    errorcode = getattr(error, 'errorcode', None)
+    if errorcode is not None:
+        return str(errorcode) in RETRYABLE_ERROR_CODES
+
+    return isinstance(error, OSError)
+
+
+class RetryPolicy:
+    """Retries transient errors with full jitter exponential backoff.
+
+    Args:
+        max_retries (``int``): Retries after the first attempt. Defaults to 2.
+        base_delay (``float``): Backoff ceiling of the first retry in seconds, doubled on
+            every retry. Defaults to 0.2.
+        max_delay (``float``): Maximum backoff ceiling in seconds. Defaults to 5.
+        classify (``callable``): ``classify(error)`` returning True for retryable errors.
+            Defaults to ``is_transient_error``.
+    """
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.2, max_delay: float = 5,
+                 classify=is_transient_error):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.classify = classify
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """Returns True if the call that failed on retry number ``attempt`` (0 for the
+        first try) should be tried again."""
+        return attempt < self.max_retries and self.classify(error)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Fails calls fast after consecutive transient errors.
+
+    Closed, calls go through. After ``failure_threshold`` transient errors in a row it opens
+    and ``before_call`` raises ``CircuitOpenException`` for ``reset_timeout`` seconds. Then a
+    single trial call is let through (half open), closing the breaker if it succeeds and
+    opening it again if it fails or ends without an outcome (``release``).
+
+    Args:
+        failure_threshold (``int``): Consecutive transient errors that open the breaker. Defaults to 5.
+        reset_timeout (``float``): Seconds the breaker stays open. Defaults to 30.
+        classify (``callable``): ``classify(error)`` returning True for errors that count as
+            failures. Other errors mean the service answered. Defaults to ``is_transient_error``.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, classify=is_transient_error):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.classify = classify
+        self.state = self.CLOSED
+        self.stats = {'failures': 0, 'opened': 0, 'rejected': 0}
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raises ``CircuitOpenException`` if the call must not be made."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            self.stats['rejected'] += 1
+            retry_in = max(0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenException(f'AliExpress API is failing, calls paused for {retry_in:.0f} seconds')
+
+    def record(self, error: Exception = None):
+        """Records the outcome of a call made after ``before_call``, ``error`` None on success."""
+        with self._lock:
+            if error is None or not self.classify(error):
+                self.state = self.CLOSED
+                self._failures = 0
+                self._trial_running = False
+                return
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.stats['opened'] += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def release(self):
+        """Ends a call made after ``before_call`` without an outcome (cancelled, interrupted).
+        A trial call ending this way opens the breaker again so the next one can be let through."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_running:
+                self.stats['opened'] += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats, state=self.state)
@@ -0,0 +1,40 @@
+"""Single-flight deduplication of identical concurrent calls.
+
+While a call for a key is running, other callers with the same key do not start their
+own call. They wait for the running one and get its result, or its exception.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers of the same key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Returns ``fn(*args, **kwargs)``, running it only if no call for ``key`` is in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,79 @@
+"""Check that polled updates are handled once each and in order within every chat.
+
+Queues a batch of product links for a few chats on the Telegram stand-in before polling
+starts, so ``getUpdates`` hands them to Bot.py together, then checks the replies: every
+chat gets one reply per update, in the order its updates were sent. Exits with 1 when an
+update is handled twice, lost or answered out of order.
+
+Usage: python benchmarks/dispatch_order.py [--chats 5] [--updates-per-chat 4]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from standins import FakeAliexpressApi, FakeRedirector, FakeTelegram
+from throughput import FIRST_PRODUCT_ID, load_bot
+
+
+# The please-wait message and the product reply
+REPLIES_PER_UPDATE = 2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--chats', type=int, default=5)
+    parser.add_argument('--updates-per-chat', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for the replies')
+    # Arguments load_bot reads
+    parser.set_defaults(record_api=None, replay_api=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    api = FakeAliexpressApi('bench-key', 'bench-secret', latency=0.01).start()
+    redirector = FakeRedirector(latency=0.01).start()
+    telegram = FakeTelegram(latency=0.005, replies_per_update=REPLIES_PER_UPDATE * args.updates_per_chat).start()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        Bot = load_bot(args, api, redirector, telegram, cache_dir)
+        # One batch, the updates of the chats interleaved as they would arrive
+        sent = {chat_id: [] for chat_id in range(1, args.chats + 1)}
+        for index in range(args.updates_per_chat):
+            for chat_id in sent:
+                product_id = FIRST_PRODUCT_ID + chat_id * 1000 + index
+                sent[chat_id].append(product_id)
+                telegram.push_update(telegram.make_update(chat_id, f'https://www.aliexpress.com/item/{product_id}.html'))
+
+        threading.Thread(target=Bot.bot.infinity_polling, name='polling',
+                         kwargs={'timeout': 10, 'long_polling_timeout': 1}, daemon=True).start()
+        missing = telegram.wait_answered(list(sent), args.timeout)
+        # Give duplicates the time to show up
+        time.sleep(1)
+        Bot.bot.stop_polling()
+
+    failed = bool(missing)
+    if missing:
+        print(f'{len(missing)} chats did not get all their replies: {missing}')
+    for chat_id, product_ids in sent.items():
+        replies = telegram.replies[chat_id]
+        answered = [int(found) for reply in replies for found in re.findall(r'\b(\d{16})\b', reply)]
+        if len(replies) != REPLIES_PER_UPDATE * len(product_ids) or answered != product_ids:
+            failed = True
+            print(f'chat {chat_id}: sent {product_ids}, answered {answered} in {len(replies)} replies')
+    print('FAILED' if failed else f'ok: {args.chats} chats x {args.updates_per_chat} updates, each handled once, in order')
+
+    for standin in (api, redirector, telegram):
+        standin.stop()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Micro-benchmarks of the functions run on every request, checked against a stored baseline.
+
+Each case runs a function over realistic inputs and reports the best time per call over
+several repeats and the peak memory allocated by one call. Times are also taken relative
+to a fixed reference workload timed in the same run, so a slower or busier machine does
+not read as a regression. A case fails when its relative time grows past the baseline by
+more than ``--time-tolerance`` or its peak memory by more than ``--memory-tolerance``.
+Record the baseline again with ``--update-baseline`` after an intended change or a
+Python upgrade.
+
+Usage: python benchmarks/micro.py [--update-baseline] [--baseline benchmarks/micro_baseline.json]
+       [--time-tolerance 0.5] [--memory-tolerance 0.1] [--case NAME ...]
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aliexpress_api.skd import sign, setDefaultAppInfo
+from aliexpress_api.skd.api.rest import AliexpressAffiliateProductdetailGetRequest
+from aliexpress_api.helpers import api_request, parse_products
+from aliexpress_api.tools import get_product_id
+
+from product_id_extraction import LINK_CORPUS
+from response_decoding import hotproducts_page
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_baseline.json')
+BASELINE_RUNS = 3
+RECHECKS = 2
+APP_KEY = '34061046'
+APP_SECRET = 'b3a5c0d6e1f24a7b9c8d7e6f5a4b3c2d'
+
+OFFLINE_LINKS = [link for link, expected in LINK_CORPUS if expected]
+MESSAGES = [
+    'https://www.aliexpress.com/item/1005006123456789.html',
+    'شوف هاد المنتج 🔥 https://a.aliexpress.com/_mtV0j3q',
+    'Wireless Earbuds Bluetooth 5.3 Headphones\nhttps://m.aliexpress.com/item/1005006123456789.html?srcSns=sns_Copy',
+    'https://www.aliexpress.com/p/shoppingcart/index.html?availableProductShopcartIds=12000036123456789,12000036123456790',
+]
+SHOPCART_LINK = ('https://www.aliexpress.com/p/shoppingcart/index.html?_immersiveMode=true'
+                 '&availableProductShopcartIds=12000036123456789,12000036123456790,12000036123456791')
+
+
+def load_bot():
+    """Imports Bot.py with placeholder credentials and no network access at import"""
+    os.environ.update(TELEGRAM_BOT_TOKEN='123456:bench', ALIEXPRESS_API_PUBLIC=APP_KEY,
+                      ALIEXPRESS_API_SECRET=APP_SECRET, EXCHANGE_RATE_URL='http://127.0.0.1:9/rates',
+                      REDIRECT_CACHE_PATH=os.path.join(tempfile.mkdtemp(), 'redirect_cache.sqlite3'))
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    import Bot
+    return Bot
+
+
+class _Request:
+    def __init__(self, response):
+        self.response = response
+
+    def getResponse(self):
+        return self.response
+
+
+def sign_parameters():
+    return {
+        'format': 'json', 'app_key': APP_KEY, 'sign_method': 'md5', 'v': '2.0',
+        'timestamp': '1729250000000', 'partner_id': 'taobao-sdk-python-20200924',
+        'method': 'aliexpress.affiliate.link.generate', 'promotion_link_type': 0, 'tracking_id': 'telegramBot',
+        'source_values': ','.join('https://star.aliexpress.com/share/share.htm?redirectUrl='
+                                  'https%%3A%%2F%%2Fwww.aliexpress.com%%2Fitem%%2F1005006123456789.html'
+                                  '%%3FsourceType%%3D56%d' % index for index in range(3)),
+    }
+
+
+def productdetail_request():
+    setDefaultAppInfo(APP_KEY, APP_SECRET)
+    request = AliexpressAffiliateProductdetailGetRequest()
+    request.fields = 'target_sale_price,product_title,product_main_image_url,product_id'
+    request.product_ids = '1005006123456789'
+    request.target_currency = 'EUR'
+    request.target_language = 'AR'
+    request.tracking_id = 'telegramBot'
+    return request
+
+
+def cases():
+    """Returns the benchmark cases as (name, function run once per measured call)"""
+    parameters = sign_parameters()
+    request = productdetail_request()
+    page = hotproducts_page()
+    response_name = 'aliexpress_affiliate_hotproduct_query_response'
+    Bot = load_bot()
+
+    def decode():
+        result = api_request(_Request(page), response_name)
+        return parse_products(result['products']['product'])
+
+    return [
+        ('sign', lambda: sign(APP_SECRET, parameters)),
+        ('RestApi.getApplicationParameters', request.getApplicationParameters),
+        ('RestApi.getRequest', request.getRequest),
+        ('api_request decoding (50 products)', decode),
+        ('tools.get_product_id', lambda: [get_product_id(link) for link in OFFLINE_LINKS]),
+        ('Bot.extract_link', lambda: [Bot.extract_link(message) for message in MESSAGES]),
+        ('Bot.extract_product_id', lambda: [Bot.extract_product_id(link) for link in OFFLINE_LINKS]),
+        ('Bot.build_shopcart_link', lambda: Bot.build_shopcart_link(SHOPCART_LINK)),
+    ]
+
+
+def time_per_call(function, repeat=7, min_seconds=0.1):
+    """Best seconds per call over repeat runs, each of at least min_seconds. The garbage
+    collector is paused while timing, as timeit does, so its pauses do not add noise."""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+            number *= 2
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            best = min(best, (time.perf_counter() - start) / number)
+        return best
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(function):
+    """Returns (seconds per call, seconds relative to the reference workload)"""
+    # Reference timed right before the case, so both see the same machine load
+    reference = time_per_call(reference_workload)
+    seconds = time_per_call(function)
+    return seconds, seconds / reference
+
+
+def reference_workload():
+    """Fixed mix of the work the cases do (hashing, sorting, string and dict handling)"""
+    items = {'key%02d' % index: 'value%d' % (index * 7919 % 100) for index in range(40)}
+    text = ''.join('%s%s' % (key, items[key]) for key in sorted(items))
+    return hashlib.md5(text.encode('utf-8')).hexdigest().upper().split('A')
+
+
+def peak_memory(function):
+    """Peak bytes allocated while one call runs"""
+    function()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        function()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='allowed relative time growth')
+    parser.add_argument('--memory-tolerance', type=float, default=0.1, help='allowed relative peak memory growth')
+    parser.add_argument('--case', action='append', help='only run the cases with these names')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file).get('cases', {})
+
+    results = {}
+    regressions = 0
+    print(f'{"case":38} {"us/call":>10} {"relative":>9} {"baseline":>9} {"peak KiB":>9} {"baseline":>9}')
+    for name, function in cases():
+        if args.case and name not in args.case:
+            continue
+        expected = baseline.get(name)
+        if args.update_baseline:
+            # Median of a few measurements, so one lucky run does not set the bar
+            seconds, relative = sorted((measure(function) for _ in range(BASELINE_RUNS)), key=lambda m: m[1])[
+                BASELINE_RUNS // 2]
+        else:
+            seconds, relative = measure(function)
+            # A real regression persists, a noisy measurement does not
+            for _ in range(RECHECKS):
+                if not expected or relative <= expected['relative'] * (1 + args.time_tolerance):
+                    break
+                seconds, relative = min((seconds, relative), measure(function), key=lambda m: m[1])
+        peak = peak_memory(function)
+        results[name] = {'ns_per_call': round(seconds * 1e9), 'relative': round(relative, 3), 'peak_bytes': peak}
+
+        status = 'new'
+        if expected:
+            slower = relative > expected['relative'] * (1 + args.time_tolerance)
+            larger = peak > expected['peak_bytes'] * (1 + args.memory_tolerance)
+            status = 'REGRESSION' if slower or larger else 'ok'
+            regressions += slower or larger
+        print(f'{name:38} {seconds * 1e6:10.2f} {relative:9.2f} '
+              f'{expected["relative"] if expected else float("nan"):9.2f} '
+              f'{peak / 1024:9.1f} {expected["peak_bytes"] / 1024 if expected else float("nan"):9.1f}  {status}')
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'cases': baseline},
+                      file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    if regressions:
+        print(f'{regressions} cases regressed past the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
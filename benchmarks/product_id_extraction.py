@@ -0,0 +1,67 @@
+"""Benchmark of offline product ID extraction over the link shapes users send to the bot.
+
+Checks every link of the corpus against its expected product ID and reports the time per
+link. A link expected as None is a short link that still needs one network resolution.
+
+Usage: python benchmarks/product_id_extraction.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aliexpress_api.tools import parse_product_id
+
+
+LINK_CORPUS = [
+    ('https://www.aliexpress.com/item/1005006123456789.html', '1005006123456789'),
+    ('https://www.aliexpress.com/item/1005006123456789.html?spm=a2g0o.home.0.0.650c2145Xk&pdp_npi=4%40dis%21USD%2112.34%218.99%21%21%21',
+     '1005006123456789'),
+    ('https://m.aliexpress.com/item/1005006123456789.html?srcSns=sns_Copy&businessType=ProductDetail', '1005006123456789'),
+    ('https://es.aliexpress.com/item/1005006123456789.html', '1005006123456789'),
+    ('https://ar.aliexpress.com/item/1005006123456789.html?gatewayAdapt=glo2ara', '1005006123456789'),
+    ('https://fr.aliexpress.com/item/4000123456789.html', '4000123456789'),
+    ('https://aliexpress.ru/item/1005006123456789.html?sku_id=12000036123456789', '1005006123456789'),
+    ('https://www.aliexpress.us/item/3256805123456789.html?gatewayAdapt=glo2usa4itemAdapt', '3256805123456789'),
+    ('https://www.aliexpress.com/i/1005006123456789.html', '1005006123456789'),
+    ('https://m.aliexpress.com/p/coin-index/index.html?_immersiveMode=true&from=syicon&productIds=1005006123456789',
+     '1005006123456789'),
+    ('https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail'
+     '&redirectUrl=https%3A%2F%2Fwww.aliexpress.com%2Fitem%2F1005006123456789.html%3FsourceType%3D560',
+     '1005006123456789'),
+    ('https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail'
+     '&redirectUrl=https://ar.aliexpress.com/item/1005006123456789.html?sourceType=562&aff_fcid=', '1005006123456789'),
+    ('https://m.aliexpress.com/app/web/buyerPage.html?productId=1005006123456789', '1005006123456789'),
+    ('https://www.aliexpress.com/ssr/300000512/BundleDeals2?itemId=1005006123456789&_t=1712345678901',
+     '1005006123456789'),
+    # Millisecond timestamps are not product IDs, these links are resolved over the network
+    ('https://www.aliexpress.com/p/coin-pc-index/index.html?_t=1712345678901', None),
+    ('https://m.aliexpress.com/p/campaign/index.html?ts=1712345678901&t=1712345678901', None),
+    ('https://s.click.aliexpress.com/e/_DdwUZVd', None),
+    ('https://a.aliexpress.com/_mtV0j3q', None),
+    ('https://click.aliexpress.com/e/_oFx3K2m', None),
+]
+
+
+def main(number=20000):
+    failures = 0
+    for link, expected in LINK_CORPUS:
+        product_id = parse_product_id(link)
+        if product_id != expected:
+            failures += 1
+            print(f'FAIL {link}: expected {expected}, got {product_id}')
+
+    seconds = timeit.timeit(lambda: [parse_product_id(link) for link, _ in LINK_CORPUS], number=number)
+    per_link = seconds / (number * len(LINK_CORPUS)) * 1e6
+    offline = sum(1 for _, expected in LINK_CORPUS if expected)
+
+    print(f'{len(LINK_CORPUS)} link shapes, {offline} resolved offline, '
+          f'{len(LINK_CORPUS) - offline} need one network resolution')
+    print(f'{per_link:.2f} us per link')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Benchmark of building and signing an API request.
+
+Compares the former ``RestApi.getRequest`` (walking the request attributes, copying the
+system parameters into the application parameters, sorting them all in ``sign()`` and
+url-encoding the query string on every call) with the precomputed ``RequestSchema`` path,
+which reuses the parameter names, the sorted sign layout and the static query string of
+the request class. Checks that both produce the same request, then reports the time per
+signed request.
+
+Usage: python benchmarks/request_signing.py
+"""
+
+import os
+import sys
+import timeit
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aliexpress_api.skd import sign, setDefaultAppInfo
+from aliexpress_api.skd.api import base
+from aliexpress_api.skd.api.rest import (AliexpressAffiliateLinkGenerateRequest,
+                                         AliexpressAffiliateProductdetailGetRequest,
+                                         AliexpressAffiliateHotproductQueryRequest)
+
+
+APP_KEY = '34061046'
+APP_SECRET = 'b3a5c0d6e1f24a7b9c8d7e6f5a4b3c2d'
+
+
+def requests():
+    setDefaultAppInfo(APP_KEY, APP_SECRET)
+    link = AliexpressAffiliateLinkGenerateRequest()
+    link.promotion_link_type = 0
+    link.tracking_id = 'telegramBot'
+    link.source_values = ','.join(
+        'https://star.aliexpress.com/share/share.htm?platform=AE&businessType=ProductDetail'
+        '&redirectUrl=https://www.aliexpress.com/item/1005006123456789.html?sourceType=%d&aff_fcid=' % source
+        for source in (560, 562, 561))
+
+    details = AliexpressAffiliateProductdetailGetRequest()
+    details.fields = 'target_sale_price,product_title,product_main_image_url,product_id'
+    details.product_ids = ','.join(str(1005006123456789 + index) for index in range(20))
+    details.target_currency = 'EUR'
+    details.target_language = 'AR'
+    details.tracking_id = 'telegramBot'
+
+    hot = AliexpressAffiliateHotproductQueryRequest()
+    hot.category_ids = '44,502'
+    hot.keywords = 'wireless earbuds'
+    hot.page_no = 3
+    hot.page_size = 50
+    hot.sort = 'LAST_VOLUME_DESC'
+    hot.target_currency = 'EUR'
+    hot.target_language = 'AR'
+    hot.tracking_id = 'telegramBot'
+    return [('link.generate', link), ('productdetail.get', details), ('hotproduct.query', hot)]
+
+
+def former_application_parameters(request):
+    application_parameter = {}
+    for key in request.__dict__:
+        value = request.__dict__[key]
+        if (not key.startswith('__') and not key in request.getMultipartParas()
+                and not key.startswith('_RestApi__') and value is not None):
+            if key.startswith('_'):
+                application_parameter[key[1:]] = value
+            else:
+                application_parameter[key] = value
+    translate_parameter = request.getTranslateParas()
+    for key in application_parameter:
+        if key in translate_parameter:
+            application_parameter[translate_parameter[key]] = application_parameter[key]
+            del application_parameter[key]
+    return application_parameter
+
+
+def former_get_request(request, timestamp=None, authrize=None):
+    if timestamp is None:
+        timestamp = str(int(float('%.2f' % float(base.time.time())) * 1000))
+    sys_parameters = {
+        base.P_FORMAT: 'json', base.P_APPKEY: APP_KEY, base.P_SIGN_METHOD: 'md5', base.P_VERSION: '2.0',
+        base.P_TIMESTAMP: timestamp, base.P_PARTNER_ID: base.SYSTEM_GENERATE_VERSION,
+        base.P_API: request.getapiname(),
+    }
+    if authrize is not None:
+        sys_parameters[base.P_SESSION] = authrize
+    application_parameter = former_application_parameters(request)
+    sign_parameter = sys_parameters.copy()
+    sign_parameter.update(application_parameter)
+    sys_parameters[base.P_SIGN] = sign(APP_SECRET, sign_parameter)
+    body = urllib.parse.urlencode(application_parameter)
+    url = base.N_REST + '?' + urllib.parse.urlencode(sys_parameters)
+    return 'POST', url, body, request.get_request_header()
+
+
+def check_same(request, authrize=None):
+    method, url, body, header = request.getRequest(authrize)
+    timestamp = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)[base.P_TIMESTAMP][0]
+    assert (method, url, body, header) == former_get_request(request, timestamp, authrize), request.getapiname()
+
+
+def main(number=20000):
+    total_former = total_schema = 0
+    for name, request in requests():
+        check_same(request)
+        check_same(request, 'session-token')
+        former = timeit.timeit(lambda: former_get_request(request), number=number) / number
+        schema = timeit.timeit(request.getRequest, number=number) / number
+        total_former += former
+        total_schema += schema
+        print(f'{name:18} former {former * 1e6:6.2f} us  schema {schema * 1e6:6.2f} us  '
+              f'saved {(former - schema) * 1e6:5.2f} us/request (x{former / schema:.2f})')
+    print(f'{"all":18} former {total_former * 1e6:6.2f} us  schema {total_schema * 1e6:6.2f} us  '
+          f'speedup x{total_former / total_schema:.2f}')
+
+
+if __name__ == '__main__':
+    main()
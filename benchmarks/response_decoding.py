@@ -0,0 +1,96 @@
+"""Benchmark of response decoding on large hot product pages.
+
+Compares the former decoder (``json.dumps`` + ``json.loads`` with a ``SimpleNamespace``
+object hook, then a second pass over the products) with the direct decoder that builds
+the slotted models from the parsed dict. Reports time and allocated memory per page.
+
+Usage: python benchmarks/response_decoding.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aliexpress_api.helpers import parse_response, parse_products
+from aliexpress_api.models import HotProductsResponse
+
+
+RESPONSE_NAME = 'aliexpress_affiliate_hotproduct_query_response'
+
+
+def hotproducts_page(page_size=50):
+    product = {
+        'app_sale_price': '12.34', 'app_sale_price_currency': 'USD', 'commission_rate': '7.0%',
+        'discount': '45%', 'evaluate_rate': '97.8%', 'first_level_category_id': 44,
+        'first_level_category_name': 'Consumer Electronics', 'lastest_volume': 5341,
+        'hot_product_commission_rate': '9.0%', 'original_price': '22.44', 'original_price_currency': 'USD',
+        'product_detail_url': 'https://www.aliexpress.com/item/1005006123456789.html',
+        'product_main_image_url': 'https://ae01.alicdn.com/kf/S1d2c3b4a5f6e7d8c9b0a.jpg',
+        'product_small_image_urls': {'string': ['https://ae01.alicdn.com/kf/S%02d.jpg' % i for i in range(6)]},
+        'product_title': 'Wireless Earbuds Bluetooth 5.3 Headphones Noise Cancelling Sport Headset',
+        'product_video_url': '', 'promotion_link': 'https://s.click.aliexpress.com/e/_DdwUZVd',
+        'relevant_market_commission_rate': '7.0%', 'sale_price': '12.34', 'sale_price_currency': 'USD',
+        'second_level_category_id': 200001, 'second_level_category_name': 'Earphones', 'shop_id': 1100123456,
+        'shop_url': 'https://www.aliexpress.com/store/1100123456', 'target_app_sale_price': '11.40',
+        'target_app_sale_price_currency': 'EUR', 'target_original_price': '20.70',
+        'target_original_price_currency': 'EUR', 'target_sale_price': '11.40', 'target_sale_price_currency': 'EUR',
+        'promo_code_info': {'promo_code': 'AE3', 'code_value': 'US $3', 'code_mini_spend': 'US $20'},
+    }
+    products = []
+    for index in range(page_size):
+        item = dict(product, product_id=1005006123456789 + index)
+        products.append(item)
+    result = {'current_page_no': 1, 'current_record_count': page_size, 'total_record_count': 10000,
+              'products': {'product': products}}
+    return {RESPONSE_NAME: {'resp_result': {'resp_code': 200, 'resp_msg': 'Call succeeds', 'result': result}}}
+
+
+def decode_roundtrip(response):
+    response = response[RESPONSE_NAME]['resp_result']
+    response = json.loads(json.dumps(response), object_hook=lambda d: SimpleNamespace(**d))
+    result = response.result
+    for product in result.products.product:
+        product.product_small_image_urls = product.product_small_image_urls.string
+    result.products = result.products.product
+    return result
+
+
+def decode_direct(response):
+    result = parse_response(response, RESPONSE_NAME)
+    products = parse_products(result['products']['product'])
+    result = HotProductsResponse.from_dict(result)
+    result.products = products
+    return result
+
+
+def measure(decode, page, number):
+    seconds = timeit.timeit(lambda: decode(page), number=number) / number
+    tracemalloc.start()
+    kept = decode(page)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, current, peak, kept
+
+
+def main(number=300):
+    page = hotproducts_page()
+    results = {}
+    for name, decode in (('roundtrip', decode_roundtrip), ('direct', decode_direct)):
+        seconds, current, peak, result = measure(decode, page, number)
+        results[name] = seconds, current, peak
+        assert result.products[0].product_small_image_urls[0].endswith('00.jpg')
+        print(f'{name:10} {seconds * 1e3:7.3f} ms/page  retained {current / 1024:7.1f} KiB  '
+              f'peak {peak / 1024:7.1f} KiB')
+
+    old, new = results['roundtrip'], results['direct']
+    print(f'speedup x{old[0] / new[0]:.1f}, retained memory x{old[1] / new[1]:.1f}, '
+          f'peak memory x{old[2] / new[2]:.1f}')
+
+
+if __name__ == '__main__':
+    main()
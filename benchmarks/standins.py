@@ -0,0 +1,252 @@
+"""Local stand-ins for the services the bot talks to, used by the benchmarks.
+
+- ``FakeAliexpressApi`` serves ``/sync`` like the AliExpress Open Platform: it checks the
+  md5 sign of every call and answers ``link.generate`` and ``productdetail.get``, with a
+  configurable latency and share of failed calls.
+- ``FakeRedirector`` answers short links (``/e/_<product id>``) with a redirect to the
+  product page, after a configurable latency.
+- ``FakeTelegram`` serves the Bot API methods used by the bot, queues updates for
+  ``getUpdates`` and records the replies of every chat and when it got them all. It
+  also serves the exchange rate table.
+
+Every server runs on 127.0.0.1 on a free port in a background thread and counts the
+calls it gets.
+"""
+
+import collections
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aliexpress_api.skd import sign
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            if 'x-www-form-urlencoded' in (self.headers.get('Content-Type') or ''):
+                params.update(parse_qsl(body))
+        return url.path, params
+
+    def _send(self, status, body=b'', headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path, params = self._params()
+        self.server.owner.handle(self, path, params)
+
+    do_POST = do_GET
+
+
+class _StandIn:
+    """Base of the stand-ins: a threaded HTTP server with call counters."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeAliexpressApi(_StandIn):
+    """AliExpress ``/sync`` endpoint.
+
+    Args:
+        app_key (``str``), secret (``str``): Credentials the calls must be signed with.
+        latency (``float``): Seconds every call takes. Defaults to 0.05.
+        error_rate (``float``): Share of calls answered with a transient platform error. Defaults to 0.
+    """
+
+    def __init__(self, app_key, secret, latency=0.05, error_rate=0.0):
+        super().__init__()
+        self.app_key = app_key
+        self.secret = secret
+        self.latency = latency
+        self.error_rate = error_rate
+
+    def handle(self, request, path, params):
+        method = params.get('method', '')
+        self.count(method)
+        time.sleep(self.latency)
+
+        received_sign = params.pop('sign', None)
+        if path != '/sync' or params.get('app_key') != self.app_key or received_sign != sign(self.secret, params):
+            self.count('invalid_sign')
+            return request._send(200, {'error_response': {'code': 25, 'msg': 'Invalid signature',
+                                                          'sub_code': 'isv.invalid-signature'}})
+        if random.random() < self.error_rate:
+            self.count('errors')
+            return request._send(200, {'error_response': {'code': 15, 'msg': 'Remote service error',
+                                                          'sub_code': 'isp.remote-service-timeout'}})
+
+        if method == 'aliexpress.affiliate.link.generate':
+            links = [{'source_value': value, 'promotion_link': 'https://s.click.aliexpress.com/e/_aff%d' % index}
+                     for index, value in enumerate(params['source_values'].split(','))]
+            result = {'total_result_count': len(links), 'promotion_links': {'promotion_link': links}}
+        elif method == 'aliexpress.affiliate.productdetail.get':
+            products = [self.product(product_id) for product_id in params['product_ids'].split(',')]
+            result = {'current_record_count': len(products), 'products': {'product': products}}
+        else:
+            return request._send(200, {'error_response': {'code': 22, 'msg': 'Invalid method',
+                                                          'sub_code': 'isv.invalid-method'}})
+
+        response_name = method.replace('aliexpress.', 'aliexpress_', 1).replace('.', '_') + '_response'
+        request._send(200, {response_name: {'resp_result': {'resp_code': 200, 'resp_msg': 'Call succeeds',
+                                                            'result': result}}})
+
+    @staticmethod
+    def product(product_id):
+        return {
+            'product_id': int(product_id),
+            'product_title': 'Wireless Earbuds Bluetooth 5.3 Headphones %s' % product_id,
+            'product_main_image_url': 'https://ae01.alicdn.com/kf/%s.jpg' % product_id,
+            'target_sale_price': '11.40',
+            'target_sale_price_currency': 'EUR',
+        }
+
+
+class FakeRedirector(_StandIn):
+    """Short link service: ``/e/_<product id>`` redirects to the product page.
+
+    Args:
+        latency (``float``): Seconds every redirect takes. Defaults to 0.03.
+    """
+
+    def __init__(self, latency=0.03):
+        super().__init__()
+        self.latency = latency
+
+    def handle(self, request, path, params):
+        self.count('redirect')
+        time.sleep(self.latency)
+        product_id = path.rsplit('/_', 1)[-1]
+        request._send(302, headers={'Location': 'https://www.aliexpress.com/item/%s.html?spm=a2g0o' % product_id})
+
+
+class FakeTelegram(_StandIn):
+    """Telegram Bot API for ``bot<token>/<method>`` calls, plus ``/rates`` with exchange rates.
+
+    Args:
+        latency (``float``): Seconds every Bot API call takes. Defaults to 0.02.
+        replies_per_update (``int``): Messages or photos a chat gets before its update counts as
+            answered (the "please wait" message and the reply). Defaults to 2.
+    """
+
+    def __init__(self, latency=0.02, replies_per_update=2):
+        super().__init__()
+        self.latency = latency
+        self.replies_per_update = replies_per_update
+        self.api_url = self.url + '/bot{0}/{1}'
+        self.answered = {}
+        self.replies = collections.defaultdict(list)
+        self._replies = collections.Counter()
+        self._updates = []
+        self._update_id = 0
+        self._message_id = 0
+        self._condition = threading.Condition()
+
+    def make_update(self, chat_id, text):
+        """Returns a Telegram update of a private text message."""
+        with self._condition:
+            self._update_id += 1
+            update_id = self._update_id
+        user = {'id': chat_id, 'is_bot': False, 'first_name': 'Bench'}
+        return {'update_id': update_id, 'message': {
+            'message_id': update_id, 'date': int(time.time()), 'text': text,
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': user}}
+
+    def push_update(self, update):
+        """Queues an update for ``getUpdates``."""
+        with self._condition:
+            self._updates.append(update)
+            self._condition.notify_all()
+
+    def wait_answered(self, chat_ids, timeout):
+        """Waits until all chats are answered, returns those that are not."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                missing = [chat_id for chat_id in chat_ids if chat_id not in self.answered]
+                remaining = deadline - time.monotonic()
+                if not missing or remaining <= 0:
+                    return missing
+                self._condition.wait(remaining)
+
+    def handle(self, request, path, params):
+        if path == '/rates':
+            self.count('rates')
+            return request._send(200, {'base': 'USD', 'rates': {'USD': 1, 'MAD': 10.05, 'EUR': 0.92}})
+
+        method = path.rsplit('/', 1)[-1]
+        self.count(method)
+        if method == 'getUpdates':
+            return request._send(200, {'ok': True, 'result': self._get_updates(params)})
+
+        time.sleep(self.latency)
+        if method == 'getMe':
+            result = {'id': 123456, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+        elif method in ('sendMessage', 'sendPhoto'):
+            chat_id = int(params['chat_id'])
+            with self._condition:
+                self._message_id += 1
+                message_id = self._message_id
+                self._replies[chat_id] += 1
+                self.replies[chat_id].append(params.get('caption') or params.get('text', ''))
+                if self._replies[chat_id] == self.replies_per_update:
+                    self.answered[chat_id] = time.perf_counter()
+                    self._condition.notify_all()
+            result = {'message_id': message_id, 'date': int(time.time()), 'text': params.get('text', ''),
+                      'chat': {'id': chat_id, 'type': 'private'}}
+        else:
+            result = True
+        request._send(200, {'ok': True, 'result': result})
+
+    def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        timeout = float(params.get('timeout') or 0)
+        limit = int(params.get('limit') or 100)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            while not self._updates and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+            return self._updates[:limit]
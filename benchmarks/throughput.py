@@ -0,0 +1,243 @@
+"""End-to-end throughput benchmark of Bot.py against local stand-ins.
+
+Starts the stand-ins of ``standins.py`` (AliExpress ``/sync``, short link redirector,
+Telegram Bot API), points Bot.py at them and sends it product links, through the webhook
+(HTTP posts to the Flask app) and through polling (``getUpdates``). Every update comes from
+its own chat and counts as answered when the chat got the "please wait" message and the
+reply. Reports updates per second, latency percentiles from sending an update to its reply,
+and the upstream calls made per update.
+
+Client-side pacing of Telegram sends and AliExpress calls is off unless the environment
+sets it (TELEGRAM_GLOBAL_RATE, ALIEXPRESS_API_QPS, ...), so the bot itself is measured.
+
+``--record-api FILE`` saves the AliExpress responses of a run and ``--replay-api FILE``
+serves them back instead of calling the stand-in, taking its latency out of the run. A
+replayed run must send the same links as the recorded one (same ``--updates``,
+``--short-links``, ``--distinct-products`` and ``--seed``), and product batching is off in both so calls match one to one.
+
+Usage: python benchmarks/throughput.py [--mode both] [--updates 300] [--concurrency 16]
+       [--rate 0] [--short-links 0.5] [--distinct-products 0] [--api-latency 0.05]
+       [--api-error-rate 0] [--redirect-latency 0.03] [--telegram-latency 0.02]
+       [--seed 0] [--record-api FILE | --replay-api FILE]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from standins import FakeAliexpressApi, FakeRedirector, FakeTelegram
+
+
+APP_KEY = 'bench-key'
+APP_SECRET = 'bench-secret'
+BOT_TOKEN = '123456:bench'
+FIRST_PRODUCT_ID = 1005006000000000
+SHORT_LINK_PREFIX = 'https://s.click.aliexpress.com/'
+
+
+class RedirectorAdapter(HTTPAdapter):
+    """Sends requests for short links to the local redirector instead"""
+
+    def __init__(self, redirector_url, **kwargs):
+        super().__init__(**kwargs)
+        self.redirector_url = redirector_url
+
+    def send(self, request, **kwargs):
+        request.url = self.redirector_url + '/' + request.url[len(SHORT_LINK_PREFIX):]
+        return super().send(request, **kwargs)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=['webhook', 'polling', 'both'], default='both')
+    parser.add_argument('--updates', type=int, default=300, help='updates sent per mode')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent webhook posts')
+    parser.add_argument('--rate', type=float, default=0, help='updates per second, 0 sends them all at once')
+    parser.add_argument('--short-links', type=float, default=0.5, help='share of short links')
+    parser.add_argument('--distinct-products', type=int, default=0,
+                        help='distinct products per mode, 0 for a new one per update')
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--redirect-latency', type=float, default=0.03)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--timeout', type=float, default=60, help='seconds to wait for the replies')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the mix of short and full links')
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record-api', metavar='FILE', help='record the AliExpress responses to FILE')
+    recording.add_argument('--replay-api', metavar='FILE', help='replay the AliExpress responses of FILE')
+    return parser.parse_args()
+
+
+def load_bot(args, api, redirector, telegram, cache_dir):
+    """Imports Bot.py configured to use the stand-ins"""
+    os.environ.update(
+        TELEGRAM_BOT_TOKEN=BOT_TOKEN,
+        ALIEXPRESS_API_PUBLIC=APP_KEY,
+        ALIEXPRESS_API_SECRET=APP_SECRET,
+        EXCHANGE_RATE_URL=telegram.url + '/rates',
+        REDIRECT_CACHE_PATH=os.path.join(cache_dir, 'redirect_cache.sqlite3'),
+    )
+    os.environ.pop('WEBHOOK_URL', None)
+    for name, value in (('LOG_LEVEL', 'WARNING'), ('TELEGRAM_GLOBAL_RATE', '0'),
+                        ('TELEGRAM_CHAT_RATE', '0'), ('ALIEXPRESS_API_QPS', '0')):
+        os.environ.setdefault(name, value)
+    if args.record_api or args.replay_api:
+        os.environ['PRODUCT_BATCH_WINDOW'] = '0'
+
+    import telebot
+    telebot.apihelper.API_URL = telegram.api_url
+    # Stopping the poller between runs is expected, not an error worth a traceback
+    telebot.logger.setLevel(logging.CRITICAL)
+
+    import Bot
+    from aliexpress_api.skd.api import base
+
+    # Calls to the AliExpress gateway go to the local /sync stand-in, or to the recording
+    transport = base.PooledTransport(address=('127.0.0.1', api.port))
+    if args.record_api:
+        transport = base.RecordReplayTransport(args.record_api, 'record', transport)
+    elif args.replay_api:
+        transport = base.RecordReplayTransport(args.replay_api, 'replay')
+    Bot.aliexpress.transport = transport
+    Bot.redirect_session.mount(SHORT_LINK_PREFIX, RedirectorAdapter(redirector.url))
+    Bot.refresh_exchange_rates()
+    return Bot
+
+
+def message_texts(args, count, product_offset):
+    # Seeded, so runs with the same arguments send the same links
+    rng = random.Random(args.seed + product_offset)
+    distinct = args.distinct_products or count
+    texts = []
+    for index in range(count):
+        product_id = FIRST_PRODUCT_ID + product_offset + index % distinct
+        if rng.random() < args.short_links:
+            texts.append(f'{SHORT_LINK_PREFIX}e/_{product_id}')
+        else:
+            texts.append(f'https://www.aliexpress.com/item/{product_id}.html')
+    return texts
+
+
+def send_paced(args, updates, send, sent_at, concurrency):
+    """Sends the updates, all at once or at args.rate per second, recording when each was sent"""
+    start = time.perf_counter()
+
+    def send_one(index, update):
+        if args.rate:
+            delay = start + index / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent_at[update['message']['chat']['id']] = time.perf_counter()
+        send(update)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(send_one, index, update) for index, update in enumerate(updates)]:
+            future.result()
+    return start
+
+
+def run_webhook(Bot, args, updates, sent_at):
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, Bot.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='webhook-server', daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/webhook'
+    sessions = threading.local()
+
+    def post(update):
+        session = getattr(sessions, 'session', None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        response = session.post(url, json=update, timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError(f'webhook answered {response.status_code}')
+
+    try:
+        return send_paced(args, updates, post, sent_at, args.concurrency)
+    finally:
+        server.shutdown()
+
+
+def run_polling(Bot, args, updates, sent_at, telegram):
+    poller = threading.Thread(target=Bot.bot.infinity_polling, name='polling',
+                              kwargs={'timeout': 10, 'long_polling_timeout': 1}, daemon=True)
+    poller.start()
+    return send_paced(args, updates, telegram.push_update, sent_at, 1)
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(mode, count, start, sent_at, telegram, missing, calls):
+    latencies = sorted(telegram.answered[chat_id] - sent_at[chat_id] for chat_id in sent_at
+                       if chat_id in telegram.answered)
+    answered = len(latencies)
+    elapsed = max(telegram.answered[chat_id] for chat_id in sent_at if chat_id in telegram.answered) - start \
+        if answered else float('nan')
+    print(f'{mode}: {answered}/{count} updates answered in {elapsed:.2f} s, {answered / elapsed:.1f} updates/s')
+    print('  latency ms: ' + '  '.join(f'{name} {percentile(latencies, fraction) * 1000:.0f}' for name, fraction in
+                                       (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))))
+    print('  upstream calls per update:')
+    for name, value in sorted(calls.items()):
+        print(f'    {name:<45} {value / count:.2f}')
+    if missing:
+        print(f'  {len(missing)} updates not answered within the timeout')
+
+
+def main():
+    args = parse_args()
+    api = FakeAliexpressApi(APP_KEY, APP_SECRET, args.api_latency, args.api_error_rate).start()
+    redirector = FakeRedirector(args.redirect_latency).start()
+    telegram = FakeTelegram(args.telegram_latency).start()
+    standins = {'aliexpress': api, 'redirector': redirector, 'telegram': telegram}
+
+    failed = False
+    with tempfile.TemporaryDirectory() as cache_dir:
+        Bot = load_bot(args, api, redirector, telegram, cache_dir)
+        modes = ['webhook', 'polling'] if args.mode == 'both' else [args.mode]
+        for number, mode in enumerate(modes):
+            # Chats and products of each mode are new, so one mode does not warm the caches of the next
+            first_chat = 1 + number * args.updates
+            texts = message_texts(args, args.updates, number * args.updates)
+            updates = [telegram.make_update(first_chat + index, text) for index, text in enumerate(texts)]
+            before = {name: standin.calls.copy() for name, standin in standins.items()}
+            sent_at = {}
+
+            if mode == 'webhook':
+                start = run_webhook(Bot, args, updates, sent_at)
+            else:
+                start = run_polling(Bot, args, updates, sent_at, telegram)
+            missing = telegram.wait_answered(list(sent_at), args.timeout)
+            if mode == 'polling':
+                Bot.bot.stop_polling()
+
+            calls = {}
+            for name, standin in standins.items():
+                for call, value in (standin.calls - before[name]).items():
+                    if call != 'getUpdates':
+                        calls[f'{name} {call}'] = value
+            report(mode, len(updates), start, sent_at, telegram, missing, calls)
+            failed = failed or bool(missing)
+
+    for standin in standins.values():
+        standin.stop()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())